@@ -11,6 +11,10 @@ events = {
     "LIST_CLASSES": utils.create_rest_event("GET", "/classes"),
     "GET_CLASS_BY_CLASS_ID": utils.create_rest_event("GET", "/classes/c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c"),
     "DELETE_CLASS": utils.create_rest_event("DELETE", "/classes/c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c"),
+    "IMPORT_CLASSES_CSV": utils.create_rest_event("POST", "/classes/import",
+                                                  "classId,className,hoursPerWeek,programId\n"
+                                                  "c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c,Anatomy,4,c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c\n",
+                                                  {"content-type": "text/csv"}),
 }
 
 
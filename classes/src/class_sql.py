@@ -14,6 +14,62 @@ WHERE active = true
 AND class_id = %(class_id)s;
 """
 
+GET_CLASSES_BY_CLASS_IDS: str = """
+SELECT class_id, class_name, hours_per_week, program_id, active
+FROM classes
+WHERE active = true
+AND class_id = ANY(%(class_ids)s::uuid[]);
+"""
+
+# Soft delete, the row is hard deleted later by PURGE_INACTIVE_CLASSES
 DELETE_CLASS: str = """
-DELETE FROM classes WHERE class_id = %(class_id)s;
+UPDATE classes
+SET active = false
+WHERE class_id = %(class_id)s
+AND active = true;
+"""
+
+# Hard deletes one batch of soft deleted classes. Rows locked by someone else are skipped and picked up next time.
+PURGE_INACTIVE_CLASSES: str = """
+DELETE FROM classes
+WHERE class_id IN (
+  SELECT class_id
+  FROM classes
+  WHERE active = false
+  LIMIT %(batch_size)s
+  FOR UPDATE SKIP LOCKED
+);
+"""
+
+# Bulk import: rows are copied into a staging table that only lives for the transaction then merged into classes
+CREATE_CLASS_IMPORT_TABLE: str = """
+CREATE TEMP TABLE class_import ON COMMIT DROP AS
+SELECT class_id, class_name, hours_per_week, program_id, active
+FROM classes
+WITH NO DATA;
+"""
+
+# Staged classes that point at a program that doesn't exist would fail the whole merge on the foreign key,
+# so they are removed first and reported back as rejected.
+REJECT_CLASS_IMPORT_UNKNOWN_PROGRAMS: str = """
+DELETE FROM class_import i
+WHERE NOT EXISTS (SELECT 1 FROM programs p WHERE p.program_id = i.program_id)
+RETURNING class_id, program_id;
+"""
+
+MERGE_CLASS_IMPORT: str = """
+WITH merged AS (
+  INSERT INTO classes (class_id, class_name, hours_per_week, program_id, active)
+  SELECT class_id, class_name, hours_per_week, program_id, active
+  FROM class_import
+  ON CONFLICT(class_id) DO UPDATE
+  SET
+    class_name = excluded.class_name,
+    hours_per_week = excluded.hours_per_week,
+    program_id = excluded.program_id,
+    active = excluded.active
+  RETURNING (xmax = 0) AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted) AS inserted, count(*) FILTER (WHERE NOT inserted) AS updated
+FROM merged;
 """
@@ -1,7 +1,6 @@
 from aws_lambda_powertools import Logger
-from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
 import logging
-from AppShared import db_utils, utils
+from AppShared import db_trace, db_utils, router, utils
 import class_sql
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
@@ -9,40 +8,110 @@ log: Logger = Logger()
 Logger("botocore").setLevel(logging.INFO)
 Logger("urllib3").setLevel(logging.INFO)
 
-app = APIGatewayHttpResolver()
+app = router.http_resolver()
 transaction = db_utils.transaction
+conditional_get = db_utils.conditional_get
+track_invocation = db_trace.track_invocation
+db_trace.register_statements(class_sql)
 
 # Handler
 @log.inject_lambda_context()
+@track_invocation
 def handler(event: dict, context: LambdaContext) -> dict:
-    print(event)
+    log.debug(event)
     return app.resolve(event, context)
 
 
+# Scheduled entry point that hard deletes soft deleted classes in small batches
+@log.inject_lambda_context()
+@track_invocation
+def purge_handler(event: dict, context: LambdaContext) -> dict:
+    purged = db_utils.purge_in_batches(class_sql.PURGE_INACTIVE_CLASSES, context)
+    return {'purged': purged}
+
+
 #
 # Query Actions
 #
 
 @app.get("/classes")
 @transaction
+@conditional_get(app, "classes")
 def list_classes(conn) -> dict:
-    with conn.cursor() as curs:
+    # GET /classes?ids=<id>,<id> looks up a batch of classes in one round trip
+    ids = app.current_event.get_query_string_value('ids')
+    if ids is not None:
+        return list_classes_by_ids(conn, utils.parse_ids(ids, utils.to_uuid))
+
+    # The whole table can be a lot of rows, keep them as tuples and write the JSON straight from those
+    with conn.cursor(cursor_factory=db_utils.CompactCursor) as curs:
         curs.execute(class_sql.GET_CLASSES)
+        return curs.fetchall()
+
+
+def list_classes_by_ids(conn, class_ids: list) -> list:
+    with conn.cursor() as curs:
+        curs.execute(class_sql.GET_CLASSES_BY_CLASS_IDS, {"class_ids": class_ids})
         item_list = curs.fetchall()
     item_list = utils.camelfy(item_list)
-    return item_list
+    # Results come back in the order the ids were asked for with None for any that weren't found
+    return utils.order_by_ids(item_list, class_ids, 'classId')
 
 
 @app.get("/classes/<class_id>") # Resolves for a ReST endpoint
 @transaction
+@conditional_get(app, "classes")
 def get_class(conn, class_id) -> dict:
-    with conn.cursor() as curs:
-        curs.execute(class_sql.GET_CLASS_BY_CLASS_ID, {"class_id": class_id})
-        item = curs.fetchone()
+    item = db_utils.cached_fetchone(conn, class_sql.GET_CLASS_BY_CLASS_ID, {"class_id": class_id})
     item = utils.camelfy(item)
     return item
 
 
+#
+# Bulk Import
+#
+
+# Columns accepted by the import route mapped to the function that converts each raw value
+CLASS_IMPORT_COLUMNS = {
+    'class_id': utils.to_uuid,
+    'class_name': str,
+    'hours_per_week': int,
+    'program_id': utils.to_uuid,
+    'active': utils.to_bool,
+}
+
+
+@app.post("/classes/import")
+@transaction
+def import_classes(conn) -> dict:
+    rows, rejected = utils.prepare_import_rows(app.current_event.decoded_body,
+                                               app.current_event.headers.get('content-type'),
+                                               CLASS_IMPORT_COLUMNS,
+                                               required=('class_id', 'class_name', 'program_id'),
+                                               key='class_id',
+                                               defaults={'active': True})
+    received = len(rows) + len(rejected)
+    lines_by_class_id = {row[0]: line for line, row in rows}
+    with conn.cursor() as curs:
+        curs.execute(class_sql.CREATE_CLASS_IMPORT_TABLE)
+        db_utils.copy_rows(curs, 'class_import', list(CLASS_IMPORT_COLUMNS), [row for line, row in rows])
+        curs.execute(class_sql.REJECT_CLASS_IMPORT_UNKNOWN_PROGRAMS)
+        for unknown in curs.fetchall():
+            class_id = str(unknown['class_id'])
+            rejected.append({'line': lines_by_class_id[class_id], 'key': class_id,
+                             'reason': f"programId {unknown['program_id']} does not exist"})
+        curs.execute(class_sql.MERGE_CLASS_IMPORT)
+        counts = curs.fetchone()
+
+    return utils.camelfy({
+        'received': received,
+        'inserted': counts['inserted'],
+        'updated': counts['updated'],
+        'rejected_count': len(rejected),
+        'rejected': sorted(rejected, key=lambda r: r['line']),
+    })
+
+
 @app.delete("/classes/<class_id>")
 @transaction
 def delete_class(conn, class_id) -> dict:
@@ -1,6 +1,7 @@
 import sys
 import os
 import json
+import uuid
 import pytest
 
 # Add the src directory to the path so we can import the lambda function
@@ -10,7 +11,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 # Import the lambda function
 import lambda_function
-from AppShared import utils
+from AppShared import db_utils, utils
 
 class MockContext:
     def __init__(self,
@@ -49,3 +50,34 @@ def test_list_classes(list_classes_event):
     assert "active" in first_class
 
 
+def test_import_classes_ndjson():
+    """Test that an NDJSON import merges valid rows and reports the rejected ones"""
+    # New classes under an existing program so the seed data the other tests rely on isn't touched
+    class_id = str(uuid.uuid4())
+    orphan_class_id = str(uuid.uuid4())
+    program_id = "c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c"
+    ndjson_body = "\n".join([
+        json.dumps({"classId": class_id, "className": "Anatomy", "hoursPerWeek": 4, "programId": program_id}),
+        json.dumps({"classId": orphan_class_id, "className": "Orphan", "hoursPerWeek": 2,
+                    "programId": "00000000-0000-0000-0000-000000000000"}),
+        "{not json",
+    ])
+    import_event = utils.create_rest_event("POST", "/classes/import", ndjson_body,
+                                           {"content-type": "application/x-ndjson"})
+
+    try:
+        response = lambda_function.handler(import_event, MockContext())
+        body = json.loads(response["body"])
+
+        assert response["statusCode"] == 200
+        assert body["received"] == 3
+        assert body["inserted"] == 1
+        assert body["updated"] == 0
+
+        # Unknown programs and unparseable lines are both reported back with their line numbers
+        assert body["rejectedCount"] == 2
+        assert [rejected["line"] for rejected in body["rejected"]] == [2, 3]
+    finally:
+        with db_utils.transaction_wrapper() as conn:
+            with conn.cursor() as curs:
+                curs.execute("DELETE FROM classes WHERE class_id = ANY(%s::uuid[])", ([class_id, orphan_class_id],))
@@ -0,0 +1,54 @@
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.event_handler import content_types
+import importlib.util
+import logging
+import os
+import sys
+from aws_lambda_powertools.utilities.typing import LambdaContext
+from AppShared import db_trace
+
+log: Logger = Logger()
+Logger("botocore").setLevel(logging.INFO)
+Logger("urllib3").setLevel(logging.INFO)
+
+#
+# Hosts the students, programs and classes route sets in one function. They all import the same
+# AppShared.db_utils so they share one cached connection and one copy of the credentials, and there is one
+# function to keep warm instead of three.
+#
+
+SERVICES = ('students', 'programs', 'classes')
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Loads a service's lambda_function.py under its own module name so the three don't collide.
+# `make build` copies each service's src into services/<name> so it's deployed with this function,
+# locally the service's own src directory is used.
+def load_service(name: str):
+    service_dir = os.path.join(SRC_DIR, 'services', name)
+    if not os.path.isdir(service_dir):
+        service_dir = os.path.join(SRC_DIR, '..', '..', name, 'src')
+
+    # The service imports its *_sql module by name
+    sys.path.append(service_dir)
+    spec = importlib.util.spec_from_file_location(f"{name}_lambda_function",
+                                                  os.path.join(service_dir, 'lambda_function.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+services = {name: load_service(name) for name in SERVICES}
+
+
+# Handler
+@log.inject_lambda_context()
+@db_trace.track_invocation
+def handler(event: dict, context: LambdaContext) -> dict:
+    log.debug(event)
+    # The first path segment picks the service, ex: /students/1 -> students
+    service = services.get(event['rawPath'].strip('/').split('/', 1)[0])
+    if service is None:
+        return {'statusCode': 404, 'headers': {'Content-Type': content_types.APPLICATION_JSON},
+                'body': '{"statusCode":404,"message":"Not found"}', 'isBase64Encoded': False}
+    return service.app.resolve(event, context)
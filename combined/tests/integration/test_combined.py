@@ -0,0 +1,56 @@
+import sys
+import os
+import json
+import pytest
+
+# Add the src directory to the path so we can import the lambda function
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+# Add the shared directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../../shared/src')))
+
+# Import the lambda function
+import lambda_function
+from AppShared import db_utils, utils
+
+class MockContext:
+    def __init__(self,
+                 invoked_function_arn="arn:aws:lambda:us-west-2:0000000000:function:mock_function-name:dev",
+                 function_name="mock_function_name",
+                 memory_limit_in_mb=64,
+                 aws_request_id="mock_id"):
+        self.invoked_function_arn = invoked_function_arn
+        self.function_name = function_name
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.aws_request_id = aws_request_id
+
+
+@pytest.mark.parametrize("path,id_field", [
+    ("/students", "studentId"),
+    ("/programs", "programId"),
+    ("/classes", "classId"),
+])
+def test_list_through_combined_handler(path, id_field):
+    """Each service's list route is reachable through the single combined handler"""
+    response = lambda_function.handler(utils.create_rest_event("GET", path), MockContext())
+
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert isinstance(body, list)
+    assert len(body) > 0
+    assert id_field in body[0]
+
+
+def test_services_share_one_connection():
+    """All three route sets use the same cached connection"""
+    lambda_function.handler(utils.create_rest_event("GET", "/students"), MockContext())
+    connection = db_utils.connection
+
+    lambda_function.handler(utils.create_rest_event("GET", "/programs"), MockContext())
+    lambda_function.handler(utils.create_rest_event("GET", "/classes"), MockContext())
+
+    assert db_utils.connection is connection
+
+
+def test_unknown_service():
+    response = lambda_function.handler(utils.create_rest_event("GET", "/teachers"), MockContext())
+    assert response["statusCode"] == 404
@@ -9,6 +9,15 @@ events = {
     "LIST_PROGRAMS": utils.create_rest_event("GET", "/programs"),
 
     "GET_PROGRAM_BY_PROGRAM_ID": utils.create_rest_event("GET", "/programs/c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c"),
+
+    "IMPORT_PROGRAMS_CSV": utils.create_rest_event("POST", "/programs/import",
+                                                   "programId,name,code\n"
+                                                   "c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c,Nursing,NUR\n",
+                                                   {"content-type": "text/csv"}),
+
+    "IMPORT_PROGRAMS_NDJSON": utils.create_rest_event("POST", "/programs/import",
+                                                      '{"programId": "c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c", "name": "Nursing", "code": "NUR"}\n',
+                                                      {"content-type": "application/x-ndjson"}),
 }
 
 
@@ -1,7 +1,6 @@
 from aws_lambda_powertools import Logger
-from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
 import logging
-from AppShared import db_utils, utils
+from AppShared import db_trace, db_utils, router, utils
 import program_sql
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
@@ -9,41 +8,102 @@ log: Logger = Logger()
 Logger("botocore").setLevel(logging.INFO)
 Logger("urllib3").setLevel(logging.INFO)
 
-app = APIGatewayHttpResolver()
+app = router.http_resolver()
 transaction = db_utils.transaction
+conditional_get = db_utils.conditional_get
+track_invocation = db_trace.track_invocation
+db_trace.register_statements(program_sql)
 
 # Handler
 @log.inject_lambda_context()
+@track_invocation
 def handler(event: dict, context: LambdaContext) -> dict:
-    print(event)
+    log.debug(event)
     return app.resolve(event, context)
 
 
+# Scheduled entry point that hard deletes soft deleted programs in small batches
+@log.inject_lambda_context()
+@track_invocation
+def purge_handler(event: dict, context: LambdaContext) -> dict:
+    purged = db_utils.purge_in_batches(program_sql.PURGE_INACTIVE_PROGRAMS, context)
+    return {'purged': purged}
+
+
 #
 # Query Actions
 #
 
 @app.get("/programs")
 @transaction
+@conditional_get(app, "programs")
 def list_programs(conn) -> dict:
+    # GET /programs?ids=<id>,<id> looks up a batch of programs in one round trip
+    ids = app.current_event.get_query_string_value('ids')
+    if ids is not None:
+        return list_programs_by_ids(conn, utils.parse_ids(ids, utils.to_uuid))
+
+    # The whole table can be a lot of rows, keep them as tuples and write the JSON straight from those
+    with conn.cursor(cursor_factory=db_utils.CompactCursor) as curs:
+        curs.execute(program_sql.GET_PROGRAMS)
+        return curs.fetchall()
+
+
+def list_programs_by_ids(conn, program_ids: list) -> list:
     with conn.cursor() as curs:
-        curs.execute(program_sql.GET_PROGRAMS, )
+        curs.execute(program_sql.GET_PROGRAMS_BY_PROGRAM_IDS, (program_ids,))
         item_list = curs.fetchall()
     item_list = utils.camelfy(item_list)
-    return item_list
+    # Results come back in the order the ids were asked for with None for any that weren't found
+    return utils.order_by_ids(item_list, program_ids, 'programId')
 
 
 @app.get("/programs/<program_id>") # Resolves for a ReST endpoint
 @transaction
+@conditional_get(app, "programs")
 def get_program(conn, program_id) -> dict:
-    with conn.cursor() as curs:
-        curs.execute(program_sql.GET_PROGRAM_BY_PROGRAM_ID, (program_id,))
-        item = curs.fetchone()
+    item = db_utils.cached_fetchone(conn, program_sql.GET_PROGRAM_BY_PROGRAM_ID, (program_id,))
     item = utils.camelfy(item)
 
     return item
 
 
+#
+# Bulk Import
+#
+
+# Columns accepted by the import route mapped to the function that converts each raw value
+PROGRAM_IMPORT_COLUMNS = {
+    'program_id': utils.to_uuid,
+    'name': str,
+    'code': str,
+    'active': utils.to_bool,
+}
+
+
+@app.post("/programs/import")
+@transaction
+def import_programs(conn) -> dict:
+    rows, rejected = utils.prepare_import_rows(app.current_event.decoded_body,
+                                               app.current_event.headers.get('content-type'),
+                                               PROGRAM_IMPORT_COLUMNS,
+                                               required=('program_id', 'name', 'code'),
+                                               key='program_id',
+                                               defaults={'active': True})
+    with conn.cursor() as curs:
+        curs.execute(program_sql.CREATE_PROGRAM_IMPORT_TABLE)
+        db_utils.copy_rows(curs, 'program_import', list(PROGRAM_IMPORT_COLUMNS), [row for line, row in rows])
+        curs.execute(program_sql.MERGE_PROGRAM_IMPORT)
+        counts = curs.fetchone()
+
+    return utils.camelfy({
+        'received': len(rows) + len(rejected),
+        'inserted': counts['inserted'],
+        'updated': counts['updated'],
+        'rejected_count': len(rejected),
+        'rejected': rejected,
+    })
+
 
 @app.delete("/programs/<program_id>")
 @transaction
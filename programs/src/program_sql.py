@@ -14,6 +14,56 @@ WHERE active = true
 AND program_id = %s;
 """
 
+GET_PROGRAMS_BY_PROGRAM_IDS: str = """
+SELECT program_id, name, code, active
+FROM programs
+WHERE active = true
+AND program_id = ANY(%s::uuid[]);
+"""
+
+# Soft delete, the row is hard deleted later by PURGE_INACTIVE_PROGRAMS
 DELETE_PROGRAM: str = """
-DELETE FROM programs WHERE program_id = %s;
+UPDATE programs
+SET active = false
+WHERE program_id = %s
+AND active = true;
+"""
+
+# Hard deletes one batch of soft deleted programs. Rows locked by someone else are skipped and picked up next time.
+# Programs that students or classes still point at are left alone so the batch can't fail on a foreign key.
+PURGE_INACTIVE_PROGRAMS: str = """
+DELETE FROM programs
+WHERE program_id IN (
+  SELECT p.program_id
+  FROM programs p
+  WHERE p.active = false
+  AND NOT EXISTS (SELECT 1 FROM students s WHERE s.program_id = p.program_id)
+  AND NOT EXISTS (SELECT 1 FROM classes c WHERE c.program_id = p.program_id)
+  LIMIT %(batch_size)s
+  FOR UPDATE SKIP LOCKED
+);
+"""
+
+# Bulk import: rows are copied into a staging table that only lives for the transaction then merged into programs
+CREATE_PROGRAM_IMPORT_TABLE: str = """
+CREATE TEMP TABLE program_import ON COMMIT DROP AS
+SELECT program_id, name, code, active
+FROM programs
+WITH NO DATA;
+"""
+
+MERGE_PROGRAM_IMPORT: str = """
+WITH merged AS (
+  INSERT INTO programs (program_id, name, code, active)
+  SELECT program_id, name, code, active
+  FROM program_import
+  ON CONFLICT(program_id) DO UPDATE
+  SET
+    name = excluded.name,
+    code = excluded.code,
+    active = excluded.active
+  RETURNING (xmax = 0) AS inserted
+)
+SELECT count(*) FILTER (WHERE inserted) AS inserted, count(*) FILTER (WHERE NOT inserted) AS updated
+FROM merged;
 """
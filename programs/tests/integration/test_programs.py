@@ -1,6 +1,7 @@
 import json
 import sys
 import os
+import uuid
 import pytest
 from pathlib import Path
 
@@ -17,7 +18,9 @@ sys.path.insert(0, str(service_dir))
 
 # Now import the lambda_function from the current service's src directory
 import lambda_function
+import program_sql
 import utils
+from AppShared import db_utils
 
 class MockContext(LambdaContext):
     def __init__(self,
@@ -74,3 +77,70 @@ def test_get_program_by_id():
     assert body["programId"] == program_id
     assert "name" in body
     assert "code" in body
+
+
+def test_delete_and_purge_programs():
+    # A new program nothing points at, and the seed program that students and classes still point at
+    program_id = str(uuid.uuid4())
+    referenced_program_id = "c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c"
+    with db_utils.transaction_wrapper() as conn:
+        with conn.cursor() as curs:
+            curs.execute("INSERT INTO programs (program_id, name, code, active) VALUES (%s, 'Purge', 'PRG', true)",
+                         (program_id,))
+
+    try:
+        for deleted_program_id in (program_id, referenced_program_id):
+            result = lambda_function.handler(utils.create_rest_event("DELETE", f"/programs/{deleted_program_id}"),
+                                             mock_context)
+            assert result["statusCode"] == 200
+
+        # Deleted programs are gone from list
+        result = lambda_function.handler(utils.create_rest_event("GET", "/programs"), mock_context)
+        listed = {program["programId"] for program in json.loads(result["body"])}
+        assert program_id not in listed
+        assert referenced_program_id not in listed
+
+        db_utils.purge_in_batches(program_sql.PURGE_INACTIVE_PROGRAMS, batch_size=1)
+
+        # The unreferenced program is hard deleted, the referenced one is left alone
+        with db_utils.transaction_wrapper() as conn:
+            with conn.cursor() as curs:
+                curs.execute("SELECT program_id::text FROM programs WHERE program_id = ANY(%s::uuid[])",
+                             ([program_id, referenced_program_id],))
+                remaining = [row["program_id"] for row in curs.fetchall()]
+        assert remaining == [referenced_program_id]
+    finally:
+        with db_utils.transaction_wrapper() as conn:
+            with conn.cursor() as curs:
+                curs.execute("DELETE FROM programs WHERE program_id = %s", (program_id,))
+                curs.execute("UPDATE programs SET active = true WHERE program_id = %s", (referenced_program_id,))
+
+
+def test_import_programs_csv():
+    # A new program so the seed data the other tests rely on isn't touched
+    program_id = str(uuid.uuid4())
+    csv_body = ("programId,name,code\n"
+                f"{program_id},Imported,IMP\n"
+                "not-a-uuid,Broken,BRK\n")
+    import_event = utils.create_rest_event("POST", "/programs/import", csv_body, {"content-type": "text/csv"})
+
+    try:
+        # Call the lambda handler with the event and context
+        result = lambda_function.handler(import_event, mock_context)
+
+        # Verify that the response is successful
+        assert result["statusCode"] == 200
+
+        # Parse the response body
+        body = json.loads(result["body"])
+
+        # The valid row is inserted and the bad one is reported with its line number
+        assert body["received"] == 2
+        assert body["inserted"] == 1
+        assert body["updated"] == 0
+        assert body["rejectedCount"] == 1
+        assert body["rejected"][0]["line"] == 3
+    finally:
+        with db_utils.transaction_wrapper() as conn:
+            with conn.cursor() as curs:
+                curs.execute("DELETE FROM programs WHERE program_id = %s", (program_id,))
@@ -0,0 +1,87 @@
+"""
+Measures the per-invocation dispatch overhead of the Powertools APIGatewayHttpResolver against
+AppShared.router.LeanHttpResolver. The routes don't touch the database so only routing, event wrapping and
+response serialization are measured.
+
+Run from the repo root:
+    PYTHONPATH=shared/src python shared/benchmarks/bench_router.py
+"""
+import logging
+import timeit
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
+from AppShared import utils
+from AppShared.router import LeanHttpResolver
+
+ITERATIONS = 20000
+REPEAT = 5
+
+log = Logger(service="bench_router", level=logging.INFO)
+
+STUDENT = {"studentId": 1, "firstName": "Jane", "lastName": "Doe", "status": "ENROLLED", "programId": 1}
+
+EVENTS = {
+    "GET /students": utils.create_rest_event("GET", "/students"),
+    "GET /students/<student_id>": utils.create_rest_event("GET", "/students/1"),
+    "PUT /students/<student_id>": utils.create_rest_event("PUT", "/students/1", {"status": "ENROLLED"}),
+}
+
+
+class MockContext:
+    function_name = "bench_router"
+    memory_limit_in_mb = 128
+    invoked_function_arn = "arn:aws:lambda:us-east-2:000000000000:function:bench_router"
+    aws_request_id = "bench"
+
+
+def register_routes(app):
+    # A handful of routes like a real service so the dynamic routes have something to look through
+    @app.get("/students")
+    def list_students():
+        return [STUDENT] * 10
+
+    @app.get("/students/<student_id>")
+    def get_student(student_id):
+        return STUDENT
+
+    @app.put("/students/<student_id>")
+    def update_student(student_id):
+        return {**STUDENT, **app.current_event.json_body}
+
+    @app.delete("/students/<student_id>")
+    def delete_student(student_id):
+        return {"result": "success"}
+
+    @app.get("/programs/<program_id>")
+    def get_program(program_id):
+        return {"programId": program_id}
+
+    return app
+
+
+# Both resolvers get the same handler the services ship, with the logging wrapper and log.debug(event),
+# so the only difference is the resolver
+def make_handler(app):
+    @log.inject_lambda_context()
+    def handler(event, context):
+        log.debug(event)
+        return app.resolve(event, context)
+    return handler
+
+
+def bench(name: str, handler) -> float:
+    event = EVENTS[name]
+    context = MockContext()
+    # Best of a few runs so a noisy neighbour doesn't decide the result
+    seconds = min(timeit.repeat(lambda: handler(event, context), number=ITERATIONS // REPEAT, repeat=REPEAT))
+    return seconds / (ITERATIONS // REPEAT) * 1_000_000
+
+
+if __name__ == '__main__':
+    handlers = {"powertools": make_handler(register_routes(APIGatewayHttpResolver())),
+                "lean": make_handler(register_routes(LeanHttpResolver()))}
+    print(f"{'route':32}{'powertools us':>16}{'lean us':>12}{'speedup':>10}")
+    for name in EVENTS:
+        powertools_us = bench(name, handlers["powertools"])
+        lean_us = bench(name, handlers["lean"])
+        print(f"{name:32}{powertools_us:16.1f}{lean_us:12.1f}{powertools_us / lean_us:9.1f}x")
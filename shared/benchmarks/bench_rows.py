@@ -0,0 +1,95 @@
+"""
+Measures the peak memory of turning a large result set into a JSON response body, the way a list route did it
+before (RealDictCursor rows, camelfy, then the resolver's JSON serializer) and with AppShared.rows.CompactRows
+(tuples with a shared column map, serialized straight to JSON).
+
+The rows are student shaped and made up with generate_series so no tables are needed, only a database to
+connect to. Each variant runs in its own process so one can't inherit the other's memory.
+"Python peak" is the tracemalloc peak of the Python heap, "max RSS" includes libpq's copy of the result.
+
+Run from the repo root with the usual PG* environment variables pointing at any Postgres database:
+    PYTHONPATH=shared/src python shared/benchmarks/bench_rows.py [rows]
+"""
+from functools import partial
+import json
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import psycopg2
+from psycopg2.extras import RealDictCursor
+from aws_lambda_powertools.shared.json_encoder import Encoder
+from AppShared import utils
+from AppShared.rows import CompactRows
+
+ROWS = 100_000
+
+QUERY = """
+SELECT gen_random_uuid()::text AS student_uuid,
+       n AS student_id,
+       'First' || n AS first_name,
+       'Last' || n AS last_name,
+       'ENROLLED' AS status,
+       gen_random_uuid()::text AS program_id,
+       true AS active,
+       1 AS version
+FROM generate_series(1, %(rows)s) AS n
+"""
+
+# The serializer the resolvers use for a route's return value
+_dumps = partial(json.dumps, separators=(",", ":"), cls=Encoder)
+
+
+def dict_rows(conn, rows: int) -> str:
+    with conn.cursor(cursor_factory=RealDictCursor) as curs:
+        curs.execute(QUERY, {"rows": rows})
+        item_list = curs.fetchall()
+    item_list = utils.camelfy(item_list)
+    return _dumps(item_list)
+
+
+def compact_rows(conn, rows: int) -> str:
+    # The same as db_utils.CompactCursor without the tracing
+    with conn.cursor() as curs:
+        curs.execute(QUERY, {"rows": rows})
+        item_list = CompactRows.from_cursor(curs, curs.fetchall())
+    return item_list.to_json()
+
+
+VARIANTS = {"dicts": dict_rows, "compact": compact_rows}
+
+
+# Prints the variant's result as JSON. tracemalloc slows everything down and adds its own memory, so the peak
+# comes from a traced run and the time and max RSS from an untraced one.
+def run_variant(name: str, rows: int, trace: bool):
+    conn = psycopg2.connect()
+    if trace:
+        tracemalloc.start()
+    started_at = time.perf_counter()
+    body = VARIANTS[name](conn, rows)
+    seconds = time.perf_counter() - started_at
+    peak = tracemalloc.get_traced_memory()[1] if trace else None
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"peak": peak, "maxRssKb": max_rss_kb, "seconds": seconds, "bodyBytes": len(body)}))
+
+
+def measure(name: str, rows: int, trace: bool) -> dict:
+    output = subprocess.run([sys.executable, __file__, "--variant", name, str(rows), str(trace)],
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == "--variant":
+        run_variant(sys.argv[2], int(sys.argv[3]), sys.argv[4] == "True")
+        sys.exit()
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    print(f"{rows} rows")
+    print(f"{'variant':10}{'Python peak MB':>16}{'max RSS MB':>12}{'seconds':>10}{'body MB':>10}")
+    for name in VARIANTS:
+        peak = measure(name, rows, trace=True)["peak"]
+        result = measure(name, rows, trace=False)
+        print(f"{name:10}{peak / 2**20:16.1f}{result['maxRssKb'] / 1024:12.1f}"
+              f"{result['seconds']:10.2f}{result['bodyBytes'] / 2**20:10.1f}")
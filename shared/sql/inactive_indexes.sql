@@ -0,0 +1,7 @@
+-- Deletes only flip active to false, the purge functions hard delete the inactive rows later in small batches.
+-- These partial indexes stay tiny (only soft deleted rows) and let each purge batch find its rows without
+-- scanning the whole table. Safe to run again.
+
+CREATE INDEX IF NOT EXISTS students_inactive_idx ON students (student_id) WHERE active = false;
+CREATE INDEX IF NOT EXISTS programs_inactive_idx ON programs (program_id) WHERE active = false;
+CREATE INDEX IF NOT EXISTS classes_inactive_idx ON classes (class_id) WHERE active = false;
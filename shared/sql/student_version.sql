@@ -0,0 +1,5 @@
+-- Row version used for optimistic concurrency on student updates. Every update bumps it and a client that
+-- sends the version it read gets 409 Conflict instead of silently overwriting someone else's change.
+-- Safe to run again.
+
+ALTER TABLE students ADD COLUMN IF NOT EXISTS version integer NOT NULL DEFAULT 1;
@@ -0,0 +1,63 @@
+-- Per-table change counters used to answer conditional GETs (ETag / Last-Modified) without reading any rows.
+-- Every statement that inserts, updates or deletes at least one row of a tracked table bumps its counter, statements
+-- that touch no rows (ex: the last batch of a purge or deleting a row that's already gone) leave it alone.
+-- An UPDATE that sets a column to the value it already had still counts. TRUNCATE always bumps it.
+-- Writers to the same table serialize briefly on the stamp row until they commit, which is fine for these
+-- low write volume tables. Run once per database, it is safe to run again.
+
+CREATE TABLE IF NOT EXISTS table_change_stamps (
+  table_name text PRIMARY KEY,
+  change_count bigint NOT NULL DEFAULT 0,
+  changed_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Each trigger names its transition table changed_rows, TRUNCATE triggers can't have one.
+CREATE OR REPLACE FUNCTION bump_table_change_stamp() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP <> 'TRUNCATE' THEN
+    IF NOT EXISTS (SELECT 1 FROM changed_rows) THEN
+      RETURN NULL;
+    END IF;
+  END IF;
+
+  INSERT INTO table_change_stamps (table_name, change_count, changed_at)
+  VALUES (TG_TABLE_NAME, 1, now())
+  ON CONFLICT(table_name) DO UPDATE
+  SET
+    change_count = table_change_stamps.change_count + 1,
+    changed_at = excluded.changed_at;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Transition tables are only allowed on single event triggers, so there is one trigger per event
+DO $$
+DECLARE
+  tracked_table text;
+BEGIN
+  FOREACH tracked_table IN ARRAY ARRAY['students', 'programs', 'classes'] LOOP
+    -- The single statement level trigger earlier versions of this script created
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked_table || '_change_stamp', tracked_table);
+
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked_table || '_change_stamp_insert', tracked_table);
+    EXECUTE format('CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS changed_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_change_stamp()',
+                   tracked_table || '_change_stamp_insert', tracked_table);
+
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked_table || '_change_stamp_update', tracked_table);
+    EXECUTE format('CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING NEW TABLE AS changed_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_change_stamp()',
+                   tracked_table || '_change_stamp_update', tracked_table);
+
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked_table || '_change_stamp_delete', tracked_table);
+    EXECUTE format('CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS changed_rows '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_change_stamp()',
+                   tracked_table || '_change_stamp_delete', tracked_table);
+
+    EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tracked_table || '_change_stamp_truncate', tracked_table);
+    EXECUTE format('CREATE TRIGGER %I AFTER TRUNCATE ON %I '
+                   'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_change_stamp()',
+                   tracked_table || '_change_stamp_truncate', tracked_table);
+  END LOOP;
+END;
+$$;
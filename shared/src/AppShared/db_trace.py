@@ -0,0 +1,145 @@
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+import re
+import time
+from aws_lambda_powertools import Logger, Tracer
+from typing import Any, Callable, Dict, List, Optional
+
+log = Logger()
+# Only botocore is patched, psycopg2 is traced by span() below and patching it too would trace every statement twice
+tracer = Tracer(patch_modules=("botocore",))
+
+#
+# X-Ray spans and round trip accounting for database work, see db_utils.InstrumentedCursor and
+# db_utils.transaction_wrapper
+#
+# Every connect, execute, fetch, commit, rollback and reset goes through span(). It always counts the round trip
+# against the current invocation and, when tracing is on, records a subsegment annotated with the statement's name
+# so slow statements can be found in X-Ray. @track_invocation logs the counts with each response so a route that
+# quietly makes one query per row shows up in the logs.
+#
+
+# SQL text -> name of the constant it came from, ex: "GET_STUDENT". Filled in by register_statements.
+_statement_names: Dict[str, str] = {}
+_FIRST_WORDS = re.compile(r"^\s*(\w+)(?:\s+(?:INTO|FROM))?\s+(?:ONLY\s+)?([\w.]+)", re.IGNORECASE)
+
+
+def register_statements(module: Any):
+    """Registers the SQL constants of a *_sql module so spans and logs can show their names."""
+    for name, value in vars(module).items():
+        if name.isupper() and isinstance(value, str):
+            _statement_names.setdefault(value, name)
+
+
+def statement_name(query: str) -> str:
+    name = _statement_names.get(query)
+    if name is None:
+        # Composed statements and ad hoc SQL get named after their verb and table, ex: "UPDATE students"
+        match = _FIRST_WORDS.match(query)
+        name = f"{match.group(1).upper()} {match.group(2)}" if match else "SQL"
+    return name
+
+
+class InvocationStats:
+    """Database work done during one invocation."""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.rows = 0
+        self.statements = Counter()
+        self.started_at = time.perf_counter()
+
+    def as_log(self) -> dict:
+        return {
+            'dbRoundTrips': self.round_trips,
+            'dbRows': self.rows,
+            'dbStatements': dict(self.statements),
+            'durationMs': round((time.perf_counter() - self.started_at) * 1000, 1),
+        }
+
+
+stats = InvocationStats()
+
+# Callables whose dicts are added to the "Response" log line, ex: db_utils adds the result cache stats
+response_log_fields: List[Callable[[], dict]] = []
+
+
+@contextmanager
+def span(operation: str, statement: Optional[str] = None, round_trip: bool = True):
+    """
+    Counts one database operation and, when tracing is on, wraps it in an X-Ray subsegment named db.<operation>.
+
+    Yields the subsegment, or None when tracing is off, so callers can add what they only know afterwards,
+    ex: record_rows.
+    """
+    if round_trip:
+        stats.round_trips += 1
+    if statement is not None:
+        stats.statements[statement] += 1
+    if tracer.disabled:
+        yield None
+        return
+    with tracer.provider.in_subsegment(f"db.{operation}") as subsegment:
+        subsegment.put_annotation("operation", operation)
+        if statement is not None:
+            subsegment.put_annotation("statement", statement)
+        yield subsegment
+
+
+def record_rows(subsegment, rows: list):
+    """Counts rows fetched and, when tracing is on, adds their count and approximate size to subsegment."""
+    stats.rows += len(rows)
+    if subsegment is not None:
+        subsegment.put_metadata("row_count", len(rows), "db")
+        subsegment.put_metadata("bytes", sum(_row_size(row) for row in rows), "db")
+
+
+# Bytes of the values as they came over the wire, near enough. Only worked out when tracing is on.
+def _row_size(row: Any) -> int:
+    values = row.values() if isinstance(row, dict) else row
+    return sum(len(value) if isinstance(value, (str, bytes)) else 8 for value in values if value is not None)
+
+
+def start_invocation():
+    """Starts counting for a new invocation, or request when running as a web app."""
+    global stats
+    stats = InvocationStats()
+
+
+def log_response(route: Optional[str], status_code: Optional[int], error: Optional[str] = None):
+    """Logs the "Response" line with the database work done since start_invocation."""
+    extra_fields = {}
+    for fields in response_log_fields:
+        extra_fields.update(fields())
+    log.info("Response", route=route, status_code=status_code, error=error, **stats.as_log(), **extra_fields)
+
+
+def track_invocation(handler):
+    """
+    Resets the invocation's database stats before handler runs and logs them with the response status, or the
+    exception when handler raises. Goes under @log.inject_lambda_context() so the log line has the request id.
+    """
+    @wraps(handler)
+    def inner(event: dict, *args, **kwargs):
+        start_invocation()
+        response = None
+        error = None
+        try:
+            if tracer.disabled:
+                response = handler(event, *args, **kwargs)
+            else:
+                # Lambda's own segment can't be annotated, the db spans go under this one instead
+                with tracer.provider.in_subsegment(f"## {handler.__name__}") as subsegment:
+                    try:
+                        response = handler(event, *args, **kwargs)
+                    finally:
+                        subsegment.put_annotation("db_round_trips", stats.round_trips)
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            status_code = response.get('statusCode') if isinstance(response, dict) else None
+            log_response(event.get('routeKey'), status_code, error)
+    return inner
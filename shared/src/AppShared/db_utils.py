@@ -3,12 +3,20 @@ from functools import wraps
 import boto3
 from botocore.exceptions import ClientError
 import base64
+import csv
+import io
 import json
+import os
+import sys
 import psycopg2
-from psycopg2 import _connect
+from psycopg2 import _connect, sql
 from psycopg2.extras import RealDictCursor
 from aws_lambda_powertools import Logger
+from aws_lambda_powertools.event_handler import Response, content_types
 import logging
+from AppShared import db_trace, utils
+from AppShared.rows import CompactRows
+from AppShared.result_cache import ResultCache, tables_in
 
 log = Logger()
 Logger("botocore").setLevel(logging.INFO)
@@ -21,6 +29,91 @@ connection: _connect = None
 db_user = None
 db_password = None
 
+# Short lived in-container cache for hot point lookups, see cached_fetchone. A TTL of 0 turns it off.
+result_cache = ResultCache(ttl_seconds=float(os.environ.get('RESULT_CACHE_TTL_SECONDS', 5)),
+                           max_bytes=int(os.environ.get('RESULT_CACHE_MAX_BYTES', 1024 * 1024)))
+
+# Logged with every response, see db_trace.track_invocation
+db_trace.response_log_fields.append(lambda: {'resultCache': result_cache.stats()} if result_cache.enabled else {})
+
+# Table change stamps read in the current transaction, see get_change_stamp
+observed_change_stamps = {}
+
+# Maintained by the triggers in shared/sql/table_change_stamps.sql
+GET_TABLE_CHANGE_STAMP: str = """
+SELECT change_count, changed_at
+FROM table_change_stamps
+WHERE table_name = %(table_name)s;
+"""
+db_trace.register_statements(sys.modules[__name__])
+
+
+# Tells the result cache about every statement so writes invalidate what they touch, and traces every statement
+# and fetch, see db_trace
+class _InstrumentedCursorMixin:
+    def execute(self, query, vars=None):
+        query_text = query if isinstance(query, str) else query.as_string(self)
+        result_cache.note_write(query_text)
+        with db_trace.span("execute", db_trace.statement_name(query_text)) as subsegment:
+            result = super().execute(query, vars)
+            if subsegment is not None:
+                subsegment.put_metadata("row_count", self.rowcount, "db")
+        return result
+
+    def executemany(self, query, vars_list):
+        query_text = query if isinstance(query, str) else query.as_string(self)
+        result_cache.note_write(query_text)
+        # One round trip per set of parameters, psycopg2 doesn't batch them
+        vars_list = list(vars_list)
+        with db_trace.span("executemany", db_trace.statement_name(query_text)) as subsegment:
+            db_trace.stats.round_trips += max(len(vars_list) - 1, 0)
+            result = super().executemany(query, vars_list)
+            if subsegment is not None:
+                subsegment.put_metadata("row_count", self.rowcount, "db")
+        return result
+
+    def copy_expert(self, sql, file, size=8192):
+        query_text = sql if isinstance(sql, str) else sql.as_string(self)
+        result_cache.note_write(query_text)
+        with db_trace.span("copy", db_trace.statement_name(query_text)) as subsegment:
+            result = super().copy_expert(sql, file, size)
+            if subsegment is not None:
+                subsegment.put_metadata("row_count", self.rowcount, "db")
+        return result
+
+    # Client side cursors already have every row once execute returns, only named cursors go back to the server
+    def fetchone(self):
+        with db_trace.span("fetch", round_trip=self.name is not None) as subsegment:
+            row = super().fetchone()
+            db_trace.record_rows(subsegment, [] if row is None else [row])
+        return row
+
+    def fetchmany(self, size=None):
+        with db_trace.span("fetch", round_trip=self.name is not None) as subsegment:
+            rows = super().fetchmany(size) if size is not None else super().fetchmany()
+            db_trace.record_rows(subsegment, rows)
+        return rows
+
+    def fetchall(self):
+        with db_trace.span("fetch", round_trip=self.name is not None) as subsegment:
+            rows = super().fetchall()
+            db_trace.record_rows(subsegment, rows)
+        return rows
+
+
+# The connection's default cursor, rows come back as dicts
+class InstrumentedCursor(_InstrumentedCursorMixin, RealDictCursor):
+    pass
+
+
+# Opt in with conn.cursor(cursor_factory=CompactCursor) for large lists. fetchall returns CompactRows, tuples that
+# share one column map instead of a dict per row, that a route can return as is, the resolvers from
+# router.http_resolver know how to serialize them. fetchone and fetchmany return plain tuples.
+class CompactCursor(_InstrumentedCursorMixin, psycopg2.extensions.cursor):
+    def fetchall(self) -> CompactRows:
+        return CompactRows.from_cursor(self, super().fetchall())
+
+
 @contextmanager
 def transaction_wrapper(name="transaction_wrapper", **kwargs):
     global connection, db_user, db_password
@@ -35,23 +128,29 @@ def transaction_wrapper(name="transaction_wrapper", **kwargs):
 
     try:
         if connection is None or connection.closed > 0:
-            connection = psycopg2.connect(user=db_user,
-                                          password=db_password,
-                                          sslmode='prefer',
-                                          connect_timeout=5,
-                                          cursor_factory=RealDictCursor)
+            with db_trace.span("connect"):
+                connection = psycopg2.connect(user=db_user,
+                                              password=db_password,
+                                              sslmode='prefer',
+                                              connect_timeout=5,
+                                              cursor_factory=InstrumentedCursor)
 
             log.info("New DB connection created")
 
         yield connection
-        connection.commit()
+        with db_trace.span("commit"):
+            connection.commit()
     except Exception as e:
         if connection is not None:
-            connection.rollback()
+            with db_trace.span("rollback"):
+                connection.rollback()
         raise e
     finally:
         if connection is not None:
-            connection.reset()
+            with db_trace.span("reset"):
+                connection.reset()
+        result_cache.end_transaction()
+        observed_change_stamps.clear()
 
 
 # Creates a connection per-transaction, committing when complete or rolling back if there is an exception.
@@ -64,6 +163,132 @@ def transaction(func):
     return inner
 
 
+# Runs a purge statement over and over, one short transaction per batch, until a batch comes back smaller than
+# batch_size or the invocation is close to timing out. Keeping batches small keeps the locks short so cleanup
+# doesn't get in the way of the API. The statement gets the batch size as %(batch_size)s.
+def purge_in_batches(purge_sql: str, context=None, batch_size: int = None) -> int:
+    batch_size = batch_size or int(os.environ.get('PURGE_BATCH_SIZE', 500))
+    purged = 0
+    while True:
+        with transaction_wrapper(name="purge_in_batches") as conn:
+            with conn.cursor() as curs:
+                curs.execute(purge_sql, {'batch_size': batch_size})
+                batch_purged = curs.rowcount
+        purged += batch_purged
+        log.debug(f"Purged batch of {batch_purged} rows")
+
+        if batch_purged < batch_size:
+            break
+        if context is not None and context.get_remaining_time_in_millis() < 5000:
+            log.info("Stopping purge early, invocation is almost out of time")
+            break
+
+    log.info(f"Purged {purged} rows")
+    return purged
+
+
+# Returns the change counter and time of the last change for a table without touching any of its rows
+def get_change_stamp(conn, table_name: str) -> dict:
+    with conn.cursor() as curs:
+        curs.execute(GET_TABLE_CHANGE_STAMP, {'table_name': table_name})
+        stamp = curs.fetchone()
+    # Tables that haven't changed since the triggers were installed have no stamp yet
+    stamp = stamp or {'change_count': 0, 'changed_at': None}
+    observed_change_stamps[table_name] = stamp['change_count']
+    return stamp
+
+
+# Answers GET routes with an ETag and Last-Modified derived from the table's change stamp, and with
+# 304 Not Modified when the client already has the current version so the rows are never fetched.
+# Goes after @transaction because it needs the connection:
+#
+# @app.get("/students")
+# @transaction
+# @conditional_get(app, "students")
+# def list_students(conn): ...
+def conditional_get(app, table_name: str):
+    def decorator(func):
+        @wraps(func)
+        def inner(conn, *args, **kwargs):
+            stamp = get_change_stamp(conn, table_name)
+            etag = f'"{table_name}-{stamp["change_count"]}"'
+            headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+            if stamp['changed_at'] is not None:
+                headers['Last-Modified'] = utils.to_http_date(stamp['changed_at'])
+
+            if utils.is_not_modified(app.current_event.headers, etag, stamp['changed_at']):
+                return Response(status_code=304, headers=headers)
+
+            result = func(conn, *args, **kwargs)
+            return Response(status_code=200, content_type=content_types.APPLICATION_JSON, body=result,
+                            headers=headers)
+        return inner
+    return decorator
+
+
+# Fills in an update statement's {assignments} with "column = %(column)s" for each column being updated, and
+# its {version_check} with "AND version = %(version)s" when check_version is set. Column names are quoted as
+# identifiers and the values stay bound parameters.
+def compose_update(update_sql: str, columns: list, check_version: bool = False) -> sql.Composed:
+    assignments = sql.SQL(', ').join(
+        sql.SQL("{} = {}").format(sql.Identifier(column), sql.Placeholder(column)) for column in columns)
+    version_check = sql.SQL("AND version = %(version)s") if check_version else sql.SQL("")
+    return sql.SQL(update_sql).format(assignments=assignments, version_check=version_check)
+
+
+# Runs a query and fetches one row through the in-container result cache. Use it for hot point lookups that are
+# requested over and over, ex: the same student loaded by everyone looking at a roster. Results are cached by
+# SQL constant and parameters for RESULT_CACHE_TTL_SECONDS and any write this container makes to the tables the
+# query reads drops them. When the route already read the table's change stamp (see conditional_get) the stamp
+# is part of the key, so changes made by other containers are picked up right away too.
+# The returned row is shared with other callers, don't modify it.
+# Writes are seen through the connection's cursors (execute, executemany, copy_expert and anything built on them
+# like execute_values). A write hidden inside a function called with callproc or SELECT isn't, so don't cache
+# reads of tables written that way.
+def cached_fetchone(conn, query: str, params=None):
+    return _cached_fetch(conn, query, params, lambda curs: curs.fetchone())
+
+
+# Same as cached_fetchone but fetches all rows
+def cached_fetchall(conn, query: str, params=None):
+    return _cached_fetch(conn, query, params, lambda curs: curs.fetchall())
+
+
+def _cached_fetch(conn, query: str, params, fetch):
+    tables = tables_in(query)
+    stamps = tuple(sorted((table, observed_change_stamps[table]) for table in tables
+                          if table in observed_change_stamps))
+    key = (query, _freeze(params), stamps)
+
+    def load():
+        with conn.cursor() as curs:
+            curs.execute(query, params)
+            return fetch(curs)
+
+    return result_cache.get_or_load(key, tables, load)
+
+
+def _freeze(params):
+    if isinstance(params, dict):
+        return tuple(sorted((key, _freeze(value)) for key, value in params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(_freeze(value) for value in params)
+    return params
+
+
+# Streams rows into a table with COPY FROM STDIN, which is much faster than inserting them one at a time.
+# None values are written as empty unquoted CSV fields, which COPY reads as NULL.
+def copy_rows(curs, table: str, columns: list, rows: list) -> int:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    copy_sql = sql.SQL("COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)").format(
+        table=sql.Identifier(table),
+        columns=sql.SQL(', ').join(sql.Identifier(column) for column in columns))
+    curs.copy_expert(copy_sql, buffer)
+    return curs.rowcount
+
+
 # Here's how you can get credentials stored like {"username": "myuser", "password": "mypassword"} from secrets manager
 def get_db_credentials_from_sm() -> tuple:
     log.info('Retrieving db credentials from SecretsManager')
@@ -0,0 +1,187 @@
+from collections import OrderedDict
+import re
+import sys
+import threading
+import time
+from aws_lambda_powertools import Logger
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+log = Logger()
+
+#
+# A small in-container cache for the results of hot point lookups, see db_utils.cached_fetchone
+#
+# Entries are keyed by the SQL constant and its bound parameters, live for a short TTL and are evicted least
+# recently used first once the cache holds more than max_bytes. Concurrent lookups of the same key share one
+# database query. Any write statement executed in this container invalidates the entries that read from the
+# tables it touches.
+#
+
+# Tables a statement reads from or writes to. Deliberately loose, matching too many tables only invalidates more.
+_TABLE_NAME = re.compile(r"\b(?:FROM|JOIN|INTO|UPDATE|TABLE)\s+(?:ONLY\s+)?([A-Za-z_][\w.]*)", re.IGNORECASE)
+_WRITE_STATEMENT = re.compile(r"\b(?:INSERT|UPDATE|DELETE|TRUNCATE|MERGE|COPY|ALTER|DROP|CREATE)\b", re.IGNORECASE)
+
+
+def tables_in(query: str) -> frozenset:
+    return frozenset(name.lower() for name in _TABLE_NAME.findall(query))
+
+
+def is_write(query: str) -> bool:
+    return _WRITE_STATEMENT.search(query) is not None
+
+
+# Rough size of a cached result in bytes, good enough to keep the cache inside its budget
+def estimate_size(value: Any) -> int:
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'tables', 'expires_at')
+
+    def __init__(self, value: Any, size: int, tables: frozenset, expires_at: float):
+        self.value = value
+        self.size = size
+        self.tables = tables
+        self.expires_at = expires_at
+
+
+class _Flight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class ResultCache:
+    def __init__(self, ttl_seconds: float = 5, max_bytes: int = 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._bytes = 0
+        # Bumped on every invalidation so a query that was running while a write happened doesn't cache its result
+        self._generation = 0
+        # Tables written in the current transaction. Until it ends, reads of those tables bypass the cache so
+        # uncommitted rows are never cached.
+        self._dirty_tables = set()
+        self._dirty_everything = False
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_bytes > 0
+
+    def get_or_load(self, key: Hashable, tables: frozenset, load: Callable[[], Any]) -> Any:
+        if not self.enabled or self._dirty_everything or tables & self._dirty_tables:
+            return load()
+
+        leader = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            flight = self._in_flight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+            else:
+                flight = self._in_flight[key] = _Flight()
+                self.misses += 1
+                leader = True
+                generation = self._generation
+        if not leader:
+            # Someone else is already running this query, wait for their result
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = load()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if flight.error is None and generation == self._generation:
+                    self._store(key, tables, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def _store(self, key: Hashable, tables: frozenset, value: Any):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        self._entries[key] = _Entry(value, size, tables, time.monotonic() + self.ttl_seconds)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def invalidate(self, tables: Optional[Iterable[str]] = None):
+        """Drops the entries that read from any of tables, or everything when tables is None."""
+        with self._lock:
+            self._generation += 1
+            if tables is None:
+                stale_keys = list(self._entries)
+            else:
+                tables = frozenset(tables)
+                stale_keys = [key for key, entry in self._entries.items() if entry.tables & tables]
+            for key in stale_keys:
+                self._remove(key)
+            self.invalidations += len(stale_keys)
+
+    def note_write(self, query: str):
+        """Called for every statement the connection executes, invalidates what a write statement touches."""
+        if not is_write(query):
+            return
+        tables = tables_in(query)
+        if tables:
+            self._dirty_tables |= tables
+            self.invalidate(tables)
+        else:
+            # A write we can't attribute to a table drops everything
+            self._dirty_everything = True
+            self.invalidate()
+
+    def end_transaction(self):
+        """Called when a transaction commits or rolls back."""
+        if self._dirty_everything:
+            self.invalidate()
+        elif self._dirty_tables:
+            self.invalidate(self._dirty_tables)
+        self._dirty_tables = set()
+        self._dirty_everything = False
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'hitRate': round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+        }
@@ -0,0 +1,123 @@
+import base64
+import os
+import re
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.event_handler import APIGatewayHttpResolver, Response, content_types
+from aws_lambda_powertools.event_handler.exceptions import ServiceError
+from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEventV2
+from AppShared import rows
+from typing import Any, Callable, Dict, List, Optional, Pattern, Tuple
+
+log = Logger()
+
+#
+# A lean stand-in for APIGatewayHttpResolver
+#
+# It has the same @app.get("/students/<student_id>") style decorators, app.current_event and
+# app.resolve(event, context), so a lambda_function.py only has to change where its app comes from.
+# Routes without parameters are found with a single dict lookup on the HTTP API routeKey ("GET /students"),
+# routes with parameters are compiled to a regex once when they are registered. There is no middleware,
+# CORS, compression or validation, use APIGatewayHttpResolver if you need those.
+#
+
+# Same characters Powertools allows in a path parameter
+_PATH_PARAMETER = re.compile(r"<(\w+)>")
+_PATH_PARAMETER_VALUE = r"[-._~()'!*:@,;=+&$%<> \[\]{}|^\w]+"
+
+
+class LeanHttpResolver:
+    def __init__(self, serializer: Optional[Callable[[Any], str]] = None):
+        self._serializer = serializer or rows.serialize
+        # "GET /students" -> function
+        self._static_routes: Dict[str, Callable] = {}
+        # "GET" -> [(compiled path, function)] in the order they were registered
+        self._dynamic_routes: Dict[str, List[Tuple[Pattern, Callable]]] = {}
+        self.current_event: Optional[APIGatewayProxyEventV2] = None
+        self.lambda_context = None
+
+    def route(self, rule: str, method: str) -> Callable:
+        def register(func: Callable) -> Callable:
+            if _PATH_PARAMETER.search(rule):
+                pattern = re.compile("^" + _PATH_PARAMETER.sub(
+                    lambda parameter: f"(?P<{parameter.group(1)}>{_PATH_PARAMETER_VALUE})", rule) + "$")
+                self._dynamic_routes.setdefault(method, []).append((pattern, func))
+            else:
+                self._static_routes[f"{method} {rule}"] = func
+            return func
+        return register
+
+    def get(self, rule: str) -> Callable:
+        return self.route(rule, "GET")
+
+    def post(self, rule: str) -> Callable:
+        return self.route(rule, "POST")
+
+    def put(self, rule: str) -> Callable:
+        return self.route(rule, "PUT")
+
+    def patch(self, rule: str) -> Callable:
+        return self.route(rule, "PATCH")
+
+    def delete(self, rule: str) -> Callable:
+        return self.route(rule, "DELETE")
+
+    def resolve(self, event: dict, context) -> dict:
+        self.current_event = APIGatewayProxyEventV2(event)
+        self.lambda_context = context
+
+        method = event["requestContext"]["http"]["method"]
+        path = event["rawPath"]
+        func, path_parameters = self._find_route(event.get("routeKey"), method, path)
+        if func is None:
+            return self._build(Response(status_code=404, content_type=content_types.APPLICATION_JSON,
+                                        body={"statusCode": 404, "message": "Not found"}))
+
+        try:
+            result = func(**path_parameters)
+        except ServiceError as e:
+            result = Response(status_code=e.status_code, content_type=content_types.APPLICATION_JSON,
+                              body={"statusCode": e.status_code, "message": e.msg})
+
+        if not isinstance(result, Response):
+            result = Response(status_code=200, content_type=content_types.APPLICATION_JSON, body=result)
+        return self._build(result)
+
+    def _find_route(self, route_key: Optional[str], method: str, path: str) -> Tuple[Optional[Callable], dict]:
+        func = self._static_routes.get(route_key) or self._static_routes.get(f"{method} {path}")
+        if func is not None:
+            return func, {}
+        for pattern, func in self._dynamic_routes.get(method, ()):
+            match = pattern.match(path)
+            if match:
+                return func, match.groupdict()
+        return None, {}
+
+    def _build(self, response: Response) -> dict:
+        body = response.body
+        if response.is_json() and not isinstance(body, str):
+            body = self._serializer(body)
+
+        is_base64_encoded = False
+        if isinstance(body, bytes):
+            is_base64_encoded = True
+            body = base64.b64encode(body).decode()
+
+        headers = {key: ", ".join(value) if isinstance(value, list) else value
+                   for key, value in response.headers.items()}
+        return {
+            "statusCode": response.status_code,
+            "body": body,
+            "isBase64Encoded": is_base64_encoded,
+            "headers": headers,
+            "cookies": [str(cookie) for cookie in response.cookies],
+        }
+
+
+# Returns the lean resolver when the LEAN_ROUTER environment variable is "true" and the Powertools
+# APIGatewayHttpResolver otherwise, so a stage can switch between them without any code changes.
+# Both serialize with rows.serialize so routes can return CompactRows.
+def http_resolver():
+    if os.environ.get("LEAN_ROUTER", "false").lower() == "true":
+        log.debug("Using LeanHttpResolver")
+        return LeanHttpResolver(serializer=rows.serialize)
+    return APIGatewayHttpResolver(serializer=rows.serialize)
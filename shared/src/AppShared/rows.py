@@ -0,0 +1,93 @@
+from collections import namedtuple
+from datetime import date, datetime
+from functools import partial
+import json
+from json.encoder import encode_basestring_ascii
+import math
+from aws_lambda_powertools.shared.json_encoder import Encoder
+from AppShared import utils
+from typing import Any, Iterator, List, Sequence, Tuple
+
+#
+# A memory-compact stand-in for a list of RealDictCursor rows, see db_utils.CompactCursor
+#
+# A RealDictCursor row is a dict holding its own copy of every key, and camelfy then builds a second dict per row.
+# CompactRows keeps the plain tuples the cursor fetched plus one column map shared by all of them, and to_json
+# writes the camelCased JSON objects straight from the tuples, so a large list never exists as dicts.
+# Rows are handed out as namedtuples (no __dict__, the same size as a tuple) only when they're asked for.
+#
+
+_dumps = partial(json.dumps, separators=(",", ":"), cls=Encoder)
+
+
+# The JSON for one column value, the same as camelfy followed by the resolvers' JSON serializer would produce
+def _encode(value: Any) -> str:
+    if value is None:
+        return "null"
+    value_type = type(value)
+    if value_type is str:
+        return encode_basestring_ascii(value)
+    if value_type is int:
+        return int.__repr__(value)
+    if value_type is bool:
+        return "true" if value else "false"
+    if value_type is float and math.isfinite(value):
+        return float.__repr__(value)
+    if isinstance(value, (datetime, date)):
+        # camelfy_object turns dates into strings
+        return encode_basestring_ascii(str(value))
+    return _dumps(value)
+
+
+class CompactRows(Sequence):
+    """
+    The rows of a result set as tuples with one shared column map.
+
+    Iterating or indexing gives namedtuple rows, ex: row.student_id or row[0], built as they're asked for.
+    to_json() gives the same JSON array camelfy(rows) would, without building a dict per row.
+    """
+
+    __slots__ = ('columns', 'Row', '_rows', '_template')
+
+    def __init__(self, columns: Sequence[str], rows: List[tuple]):
+        self.columns: Tuple[str, ...] = tuple(columns)
+        # rename=True keeps columns that aren't valid identifiers, ex: "?column?", as _0, _1...
+        self.Row = namedtuple('Row', self.columns, rename=True)
+        self._rows = rows
+        # '{"studentId":%s,"firstName":%s,...}', filled in with the JSON for each value
+        self._template = "{" + ",".join(
+            encode_basestring_ascii(utils.to_camel(column)).replace("%", "%%") + ":%s" for column in self.columns
+        ) + "}"
+
+    @classmethod
+    def from_cursor(cls, cursor, rows: List[tuple]) -> "CompactRows":
+        return cls([column.name for column in cursor.description], rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CompactRows(self.columns, self._rows[index])
+        return self.Row._make(self._rows[index])
+
+    def __iter__(self) -> Iterator[tuple]:
+        return map(self.Row._make, self._rows)
+
+    def to_json(self) -> str:
+        template = self._template
+        return "[" + ",".join(template % tuple(map(_encode, row)) for row in self._rows) + "]"
+
+    def to_dicts(self) -> List[dict]:
+        """The rows camelCased as dicts, ex: for code that expects the output of camelfy."""
+        return utils.camelfy([dict(zip(self.columns, row)) for row in self._rows])
+
+
+def serialize(body: Any) -> str:
+    """
+    JSON serializer for the resolvers, see router.http_resolver. CompactRows are written straight from their
+    tuples, everything else goes through the Powertools Encoder the same as before.
+    """
+    if isinstance(body, CompactRows):
+        return body.to_json()
+    return _dumps(body)
@@ -0,0 +1,91 @@
+from functools import partial
+import io
+import json
+from aws_lambda_powertools import Logger
+from AppShared import db_trace, utils
+from typing import Callable, Iterator, Optional
+
+log = Logger()
+
+#
+# Streams query results row by row instead of building the whole body in memory
+#
+# Rows are read from a server-side cursor ITERSIZE at a time and handed out in chunks as soon as a chunk fills up,
+# so the first bytes go out after the first batch no matter how big the table is, and memory stays flat.
+# iter_query is a generator of chunks, ex: the body of a WSGI app served through the Lambda Web Adapter from a
+# Function URL in RESPONSE_STREAM mode, see students/src/stream_app.py.
+#
+
+NDJSON = "application/x-ndjson"
+JSON = "application/json"
+
+# Rows fetched from the server-side cursor per round trip
+ITERSIZE = 1000
+# Bytes buffered before a chunk is handed out
+CHUNK_SIZE = 64 * 1024
+
+_dumps = partial(json.dumps, separators=(",", ":"), default=str)
+
+
+def iter_query(conn, query: str, params, content_type: str = NDJSON, name: str = "iter_query",
+               transform: Callable[[dict], dict] = utils.camelfy_object) -> Iterator[bytes]:
+    """
+    Runs query on a server-side cursor and yields the rows serialized in chunks of about CHUNK_SIZE bytes.
+
+    Args:
+        conn: A connection from transaction_wrapper, server-side cursors only live inside a transaction so keep
+            it open until the generator is done
+        query: One of the SQL constants, ex: student_sql.GET_STUDENTS
+        params: The query's parameters
+        content_type: NDJSON yields one JSON object per line, JSON yields a single JSON array
+        name: The name of the server-side cursor
+        transform: Applied to each row before it's serialized, camelCases the keys by default
+
+    Yields:
+        UTF-8 encoded chunks, the last one may be empty
+    """
+    ndjson = content_type == NDJSON
+    buffer = io.StringIO()
+    if not ndjson:
+        buffer.write("[")
+
+    row_count = 0
+    with conn.cursor(name=name) as curs:
+        curs.itersize = ITERSIZE
+        curs.execute(query, params)
+        for row in curs:
+            if ndjson:
+                buffer.write(_dumps(transform(row)))
+                buffer.write("\n")
+            else:
+                if row_count:
+                    buffer.write(",")
+                buffer.write(_dumps(transform(row)))
+            row_count += 1
+
+            if buffer.tell() >= CHUNK_SIZE:
+                yield _drain(buffer)
+
+    # Iterating a named cursor fetches ITERSIZE rows at a time without going through fetchmany, count those here
+    db_trace.stats.round_trips += row_count // ITERSIZE + 1
+    db_trace.stats.rows += row_count
+
+    if not ndjson:
+        buffer.write("]")
+    log.debug(f"Streamed {row_count} rows")
+    yield _drain(buffer)
+
+
+def _drain(buffer: io.StringIO) -> bytes:
+    chunk = buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+# Picks NDJSON or a JSON array from ?format=ndjson|json or the Accept header, defaults to NDJSON
+def negotiate_content_type(requested_format: Optional[str], accept: Optional[str]) -> str:
+    if requested_format:
+        return JSON if requested_format.lower() == "json" else NDJSON
+    accept = accept or ""
+    return NDJSON if NDJSON in accept or JSON not in accept else JSON
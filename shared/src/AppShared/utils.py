@@ -1,8 +1,13 @@
-from datetime import datetime, date
+from datetime import datetime, date, timezone
+import csv
+import io
 import json
 import re
+import uuid
+from email.utils import format_datetime, parsedate_to_datetime
 from aws_lambda_powertools import Logger
-from typing import Any, Dict, Tuple, Callable, Optional
+from aws_lambda_powertools.event_handler.exceptions import BadRequestError
+from typing import Any, Dict, Iterator, List, Tuple, Callable, Optional
 
 log = Logger()
 
@@ -47,14 +52,183 @@ def camelfy_object(object: dict) -> dict:
     return new_object_dict
 
 
-def create_rest_event(method: str, path: str, body: Optional[dict] = None) -> dict:
+def to_uuid(value) -> str:
+    return str(uuid.UUID(str(value)))
+
+
+def to_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in ('true', 't', 'yes', 'y', '1'):
+        return True
+    if normalized in ('false', 'f', 'no', 'n', '0'):
+        return False
+    raise ValueError(f"'{value}' is not a boolean")
+
+
+#
+# Batched lookup helpers
+#
+
+# Upper bound on ids in one batched lookup so a single request can't turn into an unbounded query
+MAX_BATCH_IDS = 100
+
+
+def parse_ids(value: str, convert: Callable = str) -> list:
+    """
+    Parses a comma separated ids query string value, ex: ?ids=1,2,3
+
+    Raises:
+        BadRequestError: if there are no ids, too many ids, or an id can't be converted
+    """
+    raw_ids = [raw_id.strip() for raw_id in value.split(',') if raw_id.strip()]
+    if not raw_ids:
+        raise BadRequestError("ids must contain at least one id")
+    if len(raw_ids) > MAX_BATCH_IDS:
+        raise BadRequestError(f"ids can contain at most {MAX_BATCH_IDS} ids")
+    try:
+        return [convert(raw_id) for raw_id in raw_ids]
+    except (TypeError, ValueError) as e:
+        raise BadRequestError(f"invalid id in ids: {e}")
+
+
+def order_by_ids(items: list, ids: list, key: str) -> list:
+    """
+    Lines up the results of a batched lookup with the ids that were asked for.
+    Ids that weren't found are returned as None in their position so callers can tell which ones missed.
+    """
+    items_by_id = {item[key]: item for item in items}
+    return [items_by_id.get(item_id) for item_id in ids]
+
+
+#
+# Conditional request helpers
+#
+
+def to_http_date(value: datetime) -> str:
+    # timestamptz comes back in the session's TimeZone, HTTP dates are always GMT
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(headers: dict, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Checks the conditional request headers against the current validators of a resource.
+
+    If-None-Match takes precedence over If-Modified-Since as described in RFC 9110.
+    """
+    if_none_match = headers.get('if-none-match')
+    if if_none_match:
+        candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+        # Weak comparison: W/"x" and "x" match each other
+        return '*' in candidates or etag.removeprefix('W/') in [c.removeprefix('W/') for c in candidates]
+
+    if_modified_since = headers.get('if-modified-since')
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates only have second precision
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+#
+# Bulk import helpers
+#
+
+def read_import_records(body: str, content_type: Optional[str]) -> Iterator[Tuple[int, Any]]:
+    """
+    Reads the records of a bulk import body one at a time.
+
+    Args:
+        body: The raw request body, either CSV with a header row or NDJSON (one JSON object per line)
+        content_type: The request Content-Type, text/csv selects CSV and anything else is read as NDJSON
+
+    Yields:
+        (line number, record) tuples. Record keys are converted to snake_case. A line that can't be
+        parsed yields the exception in place of the record so the caller can report it.
+    """
+    if content_type and 'csv' in content_type.lower():
+        reader = csv.DictReader(io.StringIO(body))
+        for record in reader:
+            yield reader.line_num, {to_snake(key.strip()): value for key, value in record.items() if key}
+    else:
+        for line_number, line in enumerate(body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+                yield line_number, {to_snake(key): value for key, value in record.items()}
+            except ValueError as e:
+                yield line_number, e
+
+
+def prepare_import_rows(body: str, content_type: Optional[str], columns: Dict[str, Callable],
+                        required: Tuple[str, ...], key: str, defaults: Optional[dict] = None) -> Tuple[List[tuple], List[dict]]:
+    """
+    Validates and converts a bulk import body into rows ready to be copied into a staging table.
+
+    Args:
+        body: The raw request body (CSV or NDJSON, see read_import_records)
+        content_type: The request Content-Type
+        columns: Maps each staging column (snake_case) to a function that converts the raw value
+        required: Columns that must be present and not empty
+        key: The column that identifies a record. When a key repeats, the last record wins.
+        defaults: Values to use for optional columns that are missing or empty
+
+    Returns:
+        A list of (line number, row) pairs where each row is a tuple in the order of columns, and a list of
+        rejected rows as {'line', 'key', 'reason'} dicts
+    """
+    defaults = defaults or {}
+    rows_by_key: Dict[Any, Tuple[int, tuple]] = {}
+    rejected = []
+    for line_number, record in read_import_records(body or '', content_type):
+        if isinstance(record, Exception):
+            rejected.append({'line': line_number, 'key': None, 'reason': f"could not parse line: {record}"})
+            continue
+        try:
+            values = []
+            for column, convert in columns.items():
+                value = record.get(column)
+                if value is None or value == '':
+                    if column in required:
+                        raise ValueError(f"{to_camel(column)} is required")
+                    values.append(defaults.get(column))
+                else:
+                    try:
+                        values.append(convert(value))
+                    except (TypeError, ValueError) as e:
+                        raise ValueError(f"invalid {to_camel(column)}: {e}")
+        except ValueError as e:
+            rejected.append({'line': line_number, 'key': record.get(key), 'reason': str(e)})
+            continue
+
+        row_key = values[list(columns).index(key)]
+        if row_key in rows_by_key:
+            superseded_line = rows_by_key[row_key][0]
+            rejected.append({'line': superseded_line, 'key': row_key, 'reason': f"superseded by line {line_number}"})
+        rows_by_key[row_key] = (line_number, tuple(values))
+
+    return list(rows_by_key.values()), sorted(rejected, key=lambda r: r['line'])
+
+
+def create_rest_event(method: str, path: str, body: Optional[Any] = None, headers: Optional[dict] = None,
+                      query_params: Optional[dict] = None) -> dict:
     """
     Creates a REST API Gateway event payload similar to those in run_local.py
 
     Args:
         method: HTTP method (GET, POST, PUT, DELETE, etc.)
         path: API path (e.g., '/students', '/students/123')
-        body: Optional request body as a dictionary
+        body: Optional request body as a dictionary, or a string that is sent as is
+        headers: Optional extra request headers
+        query_params: Optional query string parameters ex: {'ids': '1,2,3'}
 
     Returns:
         A dictionary representing an API Gateway event payload
@@ -72,7 +246,8 @@ def create_rest_event(method: str, path: str, body: Optional[dict] = None) -> di
         "routeKey": route_key,
         "rawPath": path,
         "headers": {
-            "accept": "application/json"
+            "accept": "application/json",
+            **(headers or {})
         },
         "requestContext": {
             "http": {
@@ -84,8 +259,15 @@ def create_rest_event(method: str, path: str, body: Optional[dict] = None) -> di
         "isBase64Encoded": False
     }
 
+    # Add query string if provided
+    if query_params:
+        event["rawQueryString"] = "&".join(f"{key}={value}" for key, value in query_params.items())
+        event["queryStringParameters"] = query_params
+
     # Add body if provided
-    if body:
+    if isinstance(body, str):
+        event["body"] = body
+    elif body:
         # Escape JSON string for embedding in another JSON string
         event["body"] = json.dumps(body)
 
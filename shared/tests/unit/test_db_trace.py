@@ -0,0 +1,53 @@
+import os
+import sys
+import pytest
+
+# Add the shared directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from AppShared import db_trace, utils
+
+
+@pytest.fixture
+def response_logs(monkeypatch):
+    """The fields of each "Response" line track_invocation logs"""
+    logged = []
+    monkeypatch.setattr(db_trace.log, "info", lambda message, **fields: logged.append({"message": message, **fields}))
+    return logged
+
+
+def test_round_trips_logged_when_handler_fails(response_logs):
+    """A 500 is when the round trip count matters most, it's logged even when the handler raises"""
+
+    @db_trace.track_invocation
+    def handler(event, context):
+        with db_trace.span("execute", "GET_STUDENTS"):
+            pass
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        handler(utils.create_rest_event("GET", "/students"), None)
+
+    [record] = response_logs
+    assert record["route"] == "GET /students"
+    assert record["status_code"] is None
+    assert record["error"] == "RuntimeError"
+    assert record["dbRoundTrips"] == 1
+    assert record["dbStatements"] == {"GET_STUDENTS": 1}
+
+
+def test_round_trips_logged_with_response(response_logs):
+    @db_trace.track_invocation
+    def handler(event, context):
+        with db_trace.span("execute", "GET_STUDENT_BY_STUDENT_ID"):
+            pass
+        with db_trace.span("commit"):
+            pass
+        return {"statusCode": 200}
+
+    handler(utils.create_rest_event("GET", "/students/1"), None)
+
+    [record] = response_logs
+    assert record["status_code"] == 200
+    assert record["error"] is None
+    assert record["dbRoundTrips"] == 2
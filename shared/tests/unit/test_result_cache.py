@@ -0,0 +1,138 @@
+import os
+import sys
+import threading
+import time
+
+# Add the shared directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from AppShared.result_cache import ResultCache, is_write, tables_in
+
+STUDENTS = frozenset({"students"})
+
+
+class CountingLoad:
+    """Stands in for a query, counts how often it runs"""
+
+    def __init__(self, value="row", during=None):
+        self.value = value
+        self.during = during
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.during is not None:
+            self.during()
+        return self.value
+
+
+def test_tables_in_and_is_write():
+    assert tables_in("SELECT * FROM students s JOIN programs p ON p.program_id = s.program_id") == \
+        {"students", "programs"}
+    assert tables_in("UPDATE students SET status = %(status)s") == {"students"}
+    assert is_write("DELETE FROM students WHERE active = false")
+    assert not is_write("SELECT student_id FROM students")
+
+
+def test_concurrent_identical_loads_run_once():
+    cache = ResultCache()
+    release = threading.Event()
+    load = CountingLoad(during=release.wait)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load("key", STUDENTS, load)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+
+    # Let the first lookup finish once the other four are waiting on it
+    deadline = time.monotonic() + 5
+    while cache.coalesced < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert load.calls == 1
+    assert results == ["row"] * 5
+    assert (cache.misses, cache.coalesced) == (1, 4)
+
+
+def test_write_during_load_is_not_stored():
+    cache = ResultCache()
+    # Another thread writes to students while the query is running, its result may already be stale
+    load = CountingLoad(during=lambda: cache.invalidate(["students"]))
+
+    assert cache.get_or_load("key", STUDENTS, load) == "row"
+    assert cache.stats()["entries"] == 0
+
+    cache.get_or_load("key", STUDENTS, load)
+    assert load.calls == 2
+
+
+def test_reads_after_a_write_skip_the_cache_until_the_transaction_ends():
+    cache = ResultCache()
+    load = CountingLoad()
+    cache.get_or_load("key", STUDENTS, load)
+
+    cache.note_write("UPDATE students SET status = %(status)s WHERE student_id = %(student_id)s")
+    assert cache.stats()["entries"] == 0
+
+    # Uncommitted changes must never be cached, every read in this transaction goes to the database
+    cache.get_or_load("key", STUDENTS, load)
+    cache.get_or_load("key", STUDENTS, load)
+    assert load.calls == 3
+    assert cache.stats()["entries"] == 0
+
+    # Other tables are still cached
+    other_load = CountingLoad()
+    cache.get_or_load("other", frozenset({"programs"}), other_load)
+    cache.get_or_load("other", frozenset({"programs"}), other_load)
+    assert other_load.calls == 1
+
+    cache.end_transaction()
+    cache.get_or_load("key", STUDENTS, load)
+    cache.get_or_load("key", STUDENTS, load)
+    assert load.calls == 4
+
+
+def test_unattributable_write_skips_everything():
+    cache = ResultCache()
+    load = CountingLoad()
+    cache.get_or_load("key", STUDENTS, load)
+
+    cache.note_write("TRUNCATE")
+    cache.get_or_load("key", STUDENTS, load)
+    assert load.calls == 2
+
+    cache.end_transaction()
+    cache.get_or_load("key", STUDENTS, load)
+    cache.get_or_load("key", STUDENTS, load)
+    assert load.calls == 3
+
+
+def test_least_recently_used_evicted_by_size():
+    value = "x" * 1000
+    cache = ResultCache(max_bytes=2500)
+    for key in ("a", "b"):
+        cache.get_or_load(key, STUDENTS, CountingLoad(value))
+    # Touch "a" so "b" is the least recently used
+    cache.get_or_load("a", STUDENTS, CountingLoad(value))
+
+    cache.get_or_load("c", STUDENTS, CountingLoad(value))
+    assert cache.evictions == 1
+
+    load = CountingLoad(value)
+    cache.get_or_load("a", STUDENTS, load)
+    cache.get_or_load("b", STUDENTS, load)
+    assert load.calls == 1
+    assert cache.stats()["bytes"] <= 2500
+
+
+def test_entries_expire():
+    cache = ResultCache(ttl_seconds=0.01)
+    load = CountingLoad()
+    cache.get_or_load("key", STUDENTS, load)
+    time.sleep(0.02)
+    cache.get_or_load("key", STUDENTS, load)
+    assert load.calls == 2
@@ -0,0 +1,65 @@
+import os
+import sys
+import pytest
+
+# Add the shared directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from aws_lambda_powertools.event_handler import APIGatewayHttpResolver, Response
+from aws_lambda_powertools.event_handler.exceptions import NotFoundError, ServiceError
+from AppShared import utils
+from AppShared.router import LeanHttpResolver
+
+
+def register_routes(app):
+    @app.get("/students")
+    def list_students():
+        return [{"studentId": 1}, {"studentId": 2}]
+
+    @app.get("/students/<student_id>")
+    def get_student(student_id):
+        return {"studentId": student_id}
+
+    @app.post("/students")
+    def create_student():
+        return app.current_event.json_body
+
+    @app.delete("/students/<student_id>")
+    def delete_student(student_id):
+        raise NotFoundError(f"Student with studentId {student_id} not found")
+
+    @app.patch("/students/<student_id>")
+    def update_student(student_id):
+        raise ServiceError(409, "Student was changed by someone else")
+
+    @app.get("/programs/<program_id>/classes/<class_id>")
+    def get_class(program_id, class_id):
+        return {"programId": program_id, "classId": class_id}
+
+    @app.get("/unchanged")
+    def unchanged():
+        return Response(status_code=304, headers={"ETag": '"students-1"', "Cache-Control": "no-cache"})
+
+    return app
+
+
+powertools_app = register_routes(APIGatewayHttpResolver())
+lean_app = register_routes(LeanHttpResolver())
+
+
+@pytest.mark.parametrize("method, path, body", [
+    ("GET", "/students", None),
+    ("GET", "/students/7", None),
+    ("POST", "/students", {"firstName": "Ann"}),
+    ("GET", "/programs/p-1/classes/c-2", None),
+    ("DELETE", "/students/7", None),
+    ("PATCH", "/students/7", {"status": "ENROLLED"}),
+    ("GET", "/unchanged", None),
+    ("GET", "/not-a-route", None),
+    ("PUT", "/students", None),
+])
+def test_lean_router_matches_powertools(method, path, body):
+    """LeanHttpResolver should answer every request exactly like APIGatewayHttpResolver"""
+    event = utils.create_rest_event(method, path, body)
+
+    assert lean_app.resolve(event, None) == powertools_app.resolve(event, None)
@@ -0,0 +1,61 @@
+import json
+import os
+import sys
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from functools import partial
+import pytest
+
+# Add the shared directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from aws_lambda_powertools.shared.json_encoder import Encoder
+from AppShared import router, utils
+from AppShared.rows import CompactRows
+
+# What the resolvers used to serialize a route's camelfied dicts with
+_dumps = partial(json.dumps, separators=(",", ":"), cls=Encoder)
+
+COLUMNS = ["student_id", "first_name", "gpa", "credits", "enrolled_on", "updated_at", "active", "program_id",
+           "tags", "nan", "a%b"]
+ROWS = [
+    (1, "Ann", 3.5, Decimal("12.50"), date(2024, 3, 1), datetime(2024, 3, 1, 7, 30, tzinfo=timezone.utc), True,
+     "c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c", [1, 2], float("nan"), 1),
+    (2, 'Zoë "Z" \\ O\'Neil\n', -0.0, Decimal("NaN"), None,
+     datetime(2024, 3, 1, 2, 30, tzinfo=timezone(timedelta(hours=-5))), False, None, None, float("inf"), None),
+]
+
+
+def test_to_json_matches_camelfy():
+    """to_json must produce exactly what camelfy plus the resolvers' serializer did"""
+    rows = CompactRows(COLUMNS, ROWS)
+    dict_rows = [dict(zip(COLUMNS, row)) for row in ROWS]
+
+    assert rows.to_json() == _dumps(utils.camelfy(dict_rows))
+    assert CompactRows(COLUMNS, []).to_json() == _dumps([])
+
+
+def test_rows_are_namedtuples():
+    rows = CompactRows(COLUMNS, ROWS)
+
+    assert len(rows) == 2
+    assert rows[0].first_name == "Ann"
+    assert [row.student_id for row in rows] == [1, 2]
+    assert rows[1:].to_json() == CompactRows(COLUMNS, ROWS[1:]).to_json()
+    assert rows.to_dicts() == utils.camelfy([dict(zip(COLUMNS, row)) for row in ROWS])
+
+
+@pytest.mark.parametrize("lean_router", ["false", "true"])
+def test_route_can_return_compact_rows(monkeypatch, lean_router):
+    """Both resolvers serialize CompactRows returned straight from a route"""
+    monkeypatch.setenv("LEAN_ROUTER", lean_router)
+    app = router.http_resolver()
+
+    @app.get("/students")
+    def list_students():
+        return CompactRows(COLUMNS, ROWS)
+
+    result = app.resolve(utils.create_rest_event("GET", "/students"), None)
+
+    assert result["statusCode"] == 200
+    assert result["body"] == CompactRows(COLUMNS, ROWS).to_json()
@@ -0,0 +1,23 @@
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add the shared directory to the path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from AppShared import utils
+
+
+def test_to_http_date_converts_to_gmt():
+    """changed_at comes back in the session's TimeZone, which isn't always UTC"""
+    changed_at = datetime(2024, 3, 1, 7, 30, 15, tzinfo=timezone(timedelta(hours=-5)))
+
+    assert utils.to_http_date(changed_at) == "Fri, 01 Mar 2024 12:30:15 GMT"
+
+
+def test_is_not_modified_with_non_utc_last_modified():
+    changed_at = datetime(2024, 3, 1, 7, 30, 15, tzinfo=timezone(timedelta(hours=-5)))
+    headers = {"if-modified-since": utils.to_http_date(changed_at)}
+
+    assert utils.is_not_modified(headers, '"students-1"', changed_at)
+    assert not utils.is_not_modified(headers, '"students-1"', changed_at + timedelta(seconds=1))
@@ -2,6 +2,7 @@ import json
 import sys
 import os
 from aws_lambda_powertools.utilities.typing import LambdaContext
+from wsgiref.util import setup_testing_defaults
 from AppShared import utils
 
 events = {
@@ -26,12 +27,17 @@ events = {
 
     "GET_STUDENT_BY_STUDENT_ID": utils.create_rest_event("GET", "/students/1"),
 
+    "GET_STUDENTS_BY_STUDENT_IDS": utils.create_rest_event("GET", "/students", query_params={"ids": "1,2,3"}),
+
     "GET_STUDENT_BY_STUDENT_NAME": utils.create_rest_event("GET", "/students/name/Jones"),
 
     "CREATE_STUDENT": utils.create_rest_event("POST", "/students", {"firstName": "Jane", "last_name": "Doe", "status": "ENROLLED"}),
 
     "UPDATE_STUDENT": utils.create_rest_event("PUT", "/students/1", {"status": "ENROLLED"}),
 
+    # Run with stream_app, see run_stream
+    "STREAM_STUDENTS": utils.create_rest_event("GET", "/students", headers={"accept": "application/x-ndjson"}),
+
 }
 
 
@@ -70,10 +76,37 @@ def run(event_key, handler_function):
     return result
 
 
+# Runs a request through the streaming WSGI app and prints each chunk as it arrives
+def run_stream(event_key, wsgi_app):
+    event = events[event_key]
+    environ = {
+        'REQUEST_METHOD': event['requestContext']['http']['method'],
+        'PATH_INFO': event['rawPath'],
+        'QUERY_STRING': event.get('rawQueryString', ''),
+        'HTTP_ACCEPT': event['headers'].get('accept', ''),
+    }
+    setup_testing_defaults(environ)
+
+    def start_response(status, headers):
+        print(f"\nSTATUS: {status}")
+        print(f"HEADERS: {headers}")
+
+    print("\nBODY:")
+    chunks = 0
+    for chunk in wsgi_app(environ, start_response):
+        chunks += 1
+        print(chunk.decode(), end="")
+    print(f"\nCHUNKS: {chunks}")
+
+
 if __name__ == '__main__':
     sys.path.append(os.getcwd())
     from src import lambda_function
 
     event_name = sys.argv[1]
     print("Running event: " + event_name)
-    run(event_name, lambda_function.handler)
+    if event_name.startswith("STREAM_"):
+        from src import stream_app
+        run_stream(event_name, stream_app.app)
+    else:
+        run(event_name, lambda_function.handler)
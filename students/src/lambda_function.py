@@ -1,7 +1,7 @@
 from aws_lambda_powertools import Logger
-from aws_lambda_powertools.event_handler import APIGatewayHttpResolver
+from aws_lambda_powertools.event_handler.exceptions import BadRequestError, NotFoundError, ServiceError
 import logging
-from AppShared import db_utils, utils
+from AppShared import db_trace, db_utils, router, utils
 import student_sql
 from aws_lambda_powertools.utilities.typing import LambdaContext
 
@@ -9,31 +9,57 @@ log: Logger = Logger()
 Logger("botocore").setLevel(logging.INFO)
 Logger("urllib3").setLevel(logging.INFO)
 
-app = APIGatewayHttpResolver()
+app = router.http_resolver()
 transaction = db_utils.transaction
+conditional_get = db_utils.conditional_get
+track_invocation = db_trace.track_invocation
+db_trace.register_statements(student_sql)
 
 # Handler
 @log.inject_lambda_context()
+@track_invocation
 def handler(event: dict, context: LambdaContext) -> dict:
-    print(event)
+    log.debug(event)
     return app.resolve(event, context)
 
+
+# Scheduled entry point that hard deletes soft deleted students in small batches
+@log.inject_lambda_context()
+@track_invocation
+def purge_handler(event: dict, context: LambdaContext) -> dict:
+    purged = db_utils.purge_in_batches(student_sql.PURGE_INACTIVE_STUDENTS, context)
+    return {'purged': purged}
+
+
 @app.get("/students")
 @transaction
+@conditional_get(app, "students")
 def list_students(conn) -> dict:
+    # GET /students?ids=1,2,3 looks up a batch of students in one round trip
+    ids = app.current_event.get_query_string_value('ids')
+    if ids is not None:
+        return list_students_by_ids(conn, utils.parse_ids(ids, int))
+
+    # The whole table can be a lot of rows, keep them as tuples and write the JSON straight from those
+    with conn.cursor(cursor_factory=db_utils.CompactCursor) as curs:
+        curs.execute(student_sql.GET_STUDENTS)
+        return curs.fetchall()
+
+
+def list_students_by_ids(conn, student_ids: list) -> list:
     with conn.cursor() as curs:
-        curs.execute(student_sql.GET_STUDENTS, )
+        curs.execute(student_sql.GET_STUDENTS_BY_STUDENT_IDS, {'student_ids': student_ids})
         item_list = curs.fetchall()
     item_list = utils.camelfy(item_list)
-    return item_list
+    # Results come back in the order the ids were asked for with None for any that weren't found
+    return utils.order_by_ids(item_list, student_ids, 'studentId')
 
 
 @app.get("/students/<student_id>") # Resolves for a ReST endpoint
 @transaction
+@conditional_get(app, "students")
 def get_student(conn, student_id) -> dict:
-    with conn.cursor() as curs:
-        curs.execute(student_sql.GET_STUDENT_BY_STUDENT_ID, {'student_id': student_id})
-        item = curs.fetchone()
+    item = db_utils.cached_fetchone(conn, student_sql.GET_STUDENT_BY_STUDENT_ID, {'student_id': student_id})
     item = utils.camelfy(item)
 
     return item
@@ -48,17 +74,60 @@ def create_student(conn) -> dict:
     return save_student(conn, student_in)
 
 
+# Fields a client can change with update_student mapped to their columns
+STUDENT_UPDATE_COLUMNS = {
+    'firstName': 'first_name',
+    'lastName': 'last_name',
+    'status': 'status',
+    'programId': 'program_id',
+}
+
+
+# Fields a student read from GET /students/<student_id> has that can't be changed, a PUT of that student skips them
+STUDENT_READ_ONLY_FIELDS = {'studentUuid', 'studentId', 'version'}
+
+
+# Updates only the fields that were sent in one round trip. If the client sends the "version" it read in the body
+# the update fails with 409 when someone else changed the student in the meantime instead of overwriting their
+# change. If-Match isn't supported, the ETag from GET is for the whole table, not the student.
 @app.put("/students/<student_id>") # Resolves for a ReST endpoint
+@app.patch("/students/<student_id>")
 @transaction
 def update_student(conn, student_id) -> dict:
-    student_in = app.current_event.json_body
-    existing_student = get_student(student_id)
-    # Merge existing values with incoming values with incoming values taking precedence
-    if existing_student:
-        student_in = {**existing_student, **student_in}
-    else:
-        raise Exception(f"Student with studentId {student_in.get('studentId')} not found for update")
-    return save_student(conn, student_in)
+    student_in = app.current_event.json_body or {}
+    version = student_in.get('version')
+
+    unknown_fields = set(student_in) - set(STUDENT_UPDATE_COLUMNS) - STUDENT_READ_ONLY_FIELDS
+    if unknown_fields:
+        raise BadRequestError(f"Fields can't be updated: {', '.join(sorted(unknown_fields))}")
+    columns = [column for field, column in STUDENT_UPDATE_COLUMNS.items() if field in student_in]
+    if not columns:
+        raise BadRequestError(f"Nothing to update, expected one of: {', '.join(STUDENT_UPDATE_COLUMNS)}")
+
+    params = {column: student_in[field] for field, column in STUDENT_UPDATE_COLUMNS.items() if field in student_in}
+    params['student_id'] = student_id
+    params['updated_by'] = 'system'
+    if version is not None:
+        try:
+            params['version'] = int(version)
+        except (TypeError, ValueError):
+            raise BadRequestError(f"Invalid version: {version}")
+
+    update_sql = db_utils.compose_update(student_sql.UPDATE_STUDENT, columns, check_version=version is not None)
+    with conn.cursor() as curs:
+        curs.execute(update_sql, params)
+        item = curs.fetchone()
+        if item is None:
+            # Only reached when nothing was updated, so the happy path stays a single round trip
+            curs.execute(student_sql.GET_STUDENT_VERSION, {'student_id': student_id})
+            current = curs.fetchone()
+            if current is None:
+                raise NotFoundError(f"Student with studentId {student_id} not found for update")
+            raise ServiceError(409, f"Student with studentId {student_id} was changed by someone else, "
+                                    f"current version is {current['version']}")
+    item = utils.camelfy(item)
+
+    return item
 
 
 def save_student(conn, student_in) -> dict:
@@ -84,5 +153,5 @@ def save_student(conn, student_in) -> dict:
 @transaction
 def delete_student(conn, student_id) -> dict:
     with conn.cursor() as curs:
-        curs.execute(student_sql.DELETE_STUDENT, {'student_id': student_id})
+        curs.execute(student_sql.DELETE_STUDENT, {'student_id': student_id, 'updated_by': 'system'})
     return {'result': 'success'}
\ No newline at end of file
@@ -0,0 +1,5 @@
+#!/bin/bash
+# Entry point of StreamFunction, the Lambda Web Adapter layer starts this and proxies requests to port $PORT.
+# One sync worker is enough, Lambda only sends one request at a time to each instance. --timeout 0 leaves it to
+# the function's timeout to stop a slow stream.
+exec python -m gunicorn --bind "0.0.0.0:${PORT:-8080}" --workers 1 --timeout 0 stream_app:app
@@ -0,0 +1,60 @@
+from aws_lambda_powertools import Logger
+import logging
+from urllib.parse import parse_qs
+from AppShared import db_trace, db_utils, streaming
+import student_sql
+
+log: Logger = Logger()
+Logger("botocore").setLevel(logging.INFO)
+Logger("urllib3").setLevel(logging.INFO)
+
+db_trace.register_statements(student_sql)
+
+#
+# Streams the student list as NDJSON, or as a JSON array with ?format=json, instead of buffering the whole body.
+# The first rows go out right away and there's no payload size limit, so this is the way to get large lists.
+#
+# The managed Python runtime can't stream a response, so this is a plain WSGI app. In Lambda, run.sh serves it
+# with gunicorn behind the Lambda Web Adapter layer, which relays the chunked body through a Function URL in
+# RESPONSE_STREAM mode, see StreamFunction in template.yaml. Locally, `make run-local-stream` runs it once.
+#
+
+ROUTE = "GET /students"
+NOT_FOUND = b'{"statusCode":404,"message":"Not found"}'
+
+
+def app(environ: dict, start_response):
+    path = environ.get('PATH_INFO') or '/'
+    # The Web Adapter polls this until the server is up
+    if path == '/healthz':
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    # A Function URL has no routes of its own, so / is the student list too
+    if environ['REQUEST_METHOD'] != 'GET' or path.rstrip('/') not in ('', '/students'):
+        start_response('404 Not Found', [('Content-Type', streaming.JSON)])
+        return [NOT_FOUND]
+
+    requested_format = parse_qs(environ.get('QUERY_STRING', '')).get('format', [None])[0]
+    content_type = streaming.negotiate_content_type(requested_format, environ.get('HTTP_ACCEPT'))
+    return stream_students(start_response, content_type)
+
+
+# The transaction stays open while the body is being sent, the server-side cursor lives in it
+def stream_students(start_response, content_type: str):
+    db_trace.start_invocation()
+    error = None
+    try:
+        with db_utils.transaction_wrapper(name="stream_students") as conn:
+            chunks = streaming.iter_query(conn, student_sql.GET_STUDENTS, None, content_type=content_type,
+                                          name="stream_students")
+            # The headers only go out with the first chunk, so a query that fails outright is still a 500
+            first_chunk = next(chunks)
+            start_response('200 OK', [('Content-Type', content_type)])
+            yield first_chunk
+            yield from chunks
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        db_trace.log_response(ROUTE, 200 if error is None else None, error)
@@ -1,21 +1,28 @@
 # A place to keep sql statemennts
 
 GET_STUDENTS: str = """
-SELECT student_uuid, student_id, first_name, last_name, status, program_id
+SELECT student_uuid, student_id, first_name, last_name, status, program_id, version
 FROM students
 WHERE active = true
 ORDER BY student_id;
 """
 
 GET_STUDENT_BY_STUDENT_ID: str = """
-SELECT student_uuid, student_id, first_name, last_name, status, program_id
+SELECT student_uuid, student_id, first_name, last_name, status, program_id, version
 FROM students
 WHERE active = true
 AND student_id = %(student_id)s;
 """
 
+GET_STUDENTS_BY_STUDENT_IDS: str = """
+SELECT student_uuid, student_id, first_name, last_name, status, program_id, version
+FROM students
+WHERE active = true
+AND student_id = ANY(%(student_ids)s);
+"""
+
 GET_STUDENT_BY_STUDENT_NAME: str = """
-SELECT student_uuid, student_id, first_name, last_name, status, program_id
+SELECT student_uuid, student_id, first_name, last_name, status, program_id, version
 FROM students
 WHERE active = true
 AND last_name = %(last_name)s;
@@ -34,10 +41,47 @@ SET
   status = excluded.status,
   program_id = excluded.program_id,
   active = excluded.active,
-  updated_by = excluded.updated_by
-RETURNING student_id, student_uuid, first_name, last_name, status, program_id;
+  updated_by = excluded.updated_by,
+  version = students.version + 1
+RETURNING student_id, student_uuid, first_name, last_name, status, program_id, version;
 """
 
+# Partial update of only the columns that were sent. {assignments} and {version_check} are filled in with
+# db_utils.compose_update. With a version check the update only happens if nobody changed the row since the
+# client read it.
+UPDATE_STUDENT: str = """
+UPDATE students
+SET {assignments}, version = version + 1, updated_by = %(updated_by)s
+WHERE student_id = %(student_id)s
+AND active = true
+{version_check}
+RETURNING student_uuid, student_id, first_name, last_name, status, program_id, version;
+"""
+
+# Only used to tell a missing student from a version conflict after UPDATE_STUDENT didn't update anything
+GET_STUDENT_VERSION: str = """
+SELECT version
+FROM students
+WHERE active = true
+AND student_id = %(student_id)s;
+"""
+
+# Soft delete, the row is hard deleted later by PURGE_INACTIVE_STUDENTS
 DELETE_STUDENT: str = """
-DELETE FROM students WHERE student_id = %(student_id)s
+UPDATE students
+SET active = false, updated_by = %(updated_by)s
+WHERE student_id = %(student_id)s
+AND active = true;
+"""
+
+# Hard deletes one batch of soft deleted students. Rows locked by someone else are skipped and picked up next time.
+PURGE_INACTIVE_STUDENTS: str = """
+DELETE FROM students
+WHERE student_id IN (
+  SELECT student_id
+  FROM students
+  WHERE active = false
+  LIMIT %(batch_size)s
+  FOR UPDATE SKIP LOCKED
+);
 """
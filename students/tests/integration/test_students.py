@@ -1,7 +1,9 @@
 import json
 import sys
 import os
+import uuid
 import pytest
+from wsgiref.util import setup_testing_defaults
 from pathlib import Path
 
 from aws_lambda_powertools.utilities.typing import LambdaContext
@@ -16,7 +18,9 @@ sys.path.insert(0, str(src_dir))
 sys.path.insert(0, str(service_dir))
 
 import lambda_function
-from AppShared import utils
+import stream_app
+import student_sql
+from AppShared import db_trace, db_utils, utils
 
 class MockContext(LambdaContext):
     def __init__(self,
@@ -86,4 +90,212 @@ def test_get_student_by_student_id():
     assert "firstName" in body
     assert "lastName" in body
     assert "status" in body
-    assert "programId" in body
\ No newline at end of file
+    assert "programId" in body
+
+def test_list_students_not_modified():
+    """
+    A client that sends back the ETag from a previous response gets 304 Not Modified and no body
+    as long as the students table hasn't changed.
+    """
+
+    first_result = lambda_function.handler(utils.create_rest_event("GET", "/students"), mock_context)
+    assert first_result["statusCode"] == 200
+    etag = first_result["headers"]["ETag"]
+
+    conditional_event = utils.create_rest_event("GET", "/students", headers={"if-none-match": etag})
+    result = lambda_function.handler(conditional_event, mock_context)
+
+    assert result["statusCode"] == 304
+    assert result["headers"]["ETag"] == etag
+    assert not result["body"]
+
+
+def test_etag_unchanged_when_nothing_changed():
+    """
+    Integration test that statements which change no rows leave the ETag alone, ex: deleting a student
+    that doesn't exist or a purge with nothing to purge.
+    """
+
+    etag = lambda_function.handler(utils.create_rest_event("GET", "/students"), mock_context)["headers"]["ETag"]
+
+    result = lambda_function.handler(utils.create_rest_event("DELETE", "/students/-1"), mock_context)
+    assert result["statusCode"] == 200
+    db_utils.purge_in_batches(student_sql.PURGE_INACTIVE_STUDENTS)
+
+    result = lambda_function.handler(utils.create_rest_event("GET", "/students"), mock_context)
+    assert result["headers"]["ETag"] == etag
+
+
+def test_get_students_by_student_ids():
+    """
+    Integration test for the batched lookup. Results come back in the order the ids were asked for
+    and ids that don't exist come back as None.
+    """
+
+    get_students_event = utils.create_rest_event("GET", "/students", query_params={"ids": "1,-1"})
+
+    # Call the lambda handler with the event and context
+    result = lambda_function.handler(get_students_event, mock_context)
+
+    # Verify that the response is successful
+    assert result["statusCode"] == 200
+
+    # Parse the response body
+    body = json.loads(result["body"])
+
+    # Verify that we got one entry per id in request order
+    assert len(body) == 2
+    assert body[0]["studentId"] == 1
+    assert body[1] is None
+
+
+def test_round_trips_counted():
+    """
+    Integration test for the round trip accounting. A batched lookup is one query no matter how many ids
+    are asked for.
+    """
+
+    get_students_event = utils.create_rest_event("GET", "/students", query_params={"ids": "1,2,3"})
+    result = lambda_function.handler(get_students_event, mock_context)
+    assert result["statusCode"] == 200
+
+    # The change stamp for the ETag and the lookup itself, plus commit and reset
+    assert db_trace.stats.statements == {"GET_TABLE_CHANGE_STAMP": 1, "GET_STUDENTS_BY_STUDENT_IDS": 1}
+    assert db_trace.stats.round_trips >= 4
+
+
+def test_update_student_version_conflict():
+    """
+    Integration test for optimistic concurrency. Updating with the version that was read succeeds and bumps the
+    version, updating again with the same stale version is rejected with 409.
+    """
+
+    student = json.loads(lambda_function.handler(utils.create_rest_event("GET", "/students/1"), mock_context)["body"])
+
+    # Send the status it already has so the test doesn't change any data besides the version
+    update_event = utils.create_rest_event("PATCH", "/students/1", {"status": student["status"],
+                                                                    "version": student["version"]})
+    result = lambda_function.handler(update_event, mock_context)
+    assert result["statusCode"] == 200
+    assert json.loads(result["body"])["version"] == student["version"] + 1
+
+    # The same update again is now based on a stale version
+    result = lambda_function.handler(update_event, mock_context)
+    assert result["statusCode"] == 409
+
+
+def test_put_student_read_back():
+    """
+    Integration test that a student read with GET can be sent back with PUT as is. The read only fields are
+    skipped and the version it carries is checked.
+    """
+
+    student = json.loads(lambda_function.handler(utils.create_rest_event("GET", "/students/1"), mock_context)["body"])
+
+    result = lambda_function.handler(utils.create_rest_event("PUT", "/students/1", student), mock_context)
+    assert result["statusCode"] == 200
+    body = json.loads(result["body"])
+    assert body["studentUuid"] == student["studentUuid"]
+    assert body["version"] == student["version"] + 1
+
+    # Fields that aren't on a student are still rejected
+    result = lambda_function.handler(utils.create_rest_event("PUT", "/students/1", {"nickname": "Annie"}),
+                                     mock_context)
+    assert result["statusCode"] == 400
+
+
+def test_delete_and_purge_students():
+    """
+    Integration test for soft delete and purge. A deleted student disappears from get and list right away
+    and is hard deleted by the next purge, one small batch at a time.
+    """
+
+    student_ids = [9001, 9002]
+    with db_utils.transaction_wrapper() as conn:
+        with conn.cursor() as curs:
+            for student_id in student_ids:
+                curs.execute("""
+                    INSERT INTO students (student_uuid, student_id, first_name, last_name, status, program_id,
+                                          active, updated_by, created_by)
+                    VALUES (%s, %s, 'Purge', 'Me', 'ENROLLED', 'c69ce217-c08d-4e50-bdda-4dfe4f9a9a3c',
+                            true, 'test', 'test')
+                """, (str(uuid.uuid4()), student_id))
+
+    try:
+        for student_id in student_ids:
+            result = lambda_function.handler(utils.create_rest_event("DELETE", f"/students/{student_id}"),
+                                             mock_context)
+            assert result["statusCode"] == 200
+
+        # Deleted students are gone from get and list
+        result = lambda_function.handler(utils.create_rest_event("GET", "/students/9001"), mock_context)
+        assert json.loads(result["body"] or "null") is None
+        result = lambda_function.handler(utils.create_rest_event("GET", "/students"), mock_context)
+        assert not {student["studentId"] for student in json.loads(result["body"])} & set(student_ids)
+
+        # A batch size of 1 takes more than one batch to get both
+        assert db_utils.purge_in_batches(student_sql.PURGE_INACTIVE_STUDENTS, batch_size=1) >= len(student_ids)
+
+        with db_utils.transaction_wrapper() as conn:
+            with conn.cursor() as curs:
+                curs.execute("SELECT count(*) AS remaining FROM students WHERE student_id = ANY(%s)", (student_ids,))
+                assert curs.fetchone()["remaining"] == 0
+    finally:
+        with db_utils.transaction_wrapper() as conn:
+            with conn.cursor() as curs:
+                curs.execute("DELETE FROM students WHERE student_id = ANY(%s)", (student_ids,))
+
+
+def call_stream_app(path: str, query_string: str = "", accept: str = "") -> tuple:
+    """Runs a request through the streaming WSGI app, returns the status, headers and the body's chunks"""
+    environ = {"REQUEST_METHOD": "GET", "PATH_INFO": path, "QUERY_STRING": query_string, "HTTP_ACCEPT": accept}
+    setup_testing_defaults(environ)
+    response = {}
+
+    def start_response(status, headers):
+        response["status"] = status
+        response["headers"] = dict(headers)
+
+    chunks = list(stream_app.app(environ, start_response))
+    return response["status"], response["headers"], chunks
+
+
+def test_stream_students():
+    """
+    Integration test for the streaming app. It streams the same students as list_students,
+    one JSON object per line.
+    """
+
+    status, headers, chunks = call_stream_app("/students", accept="application/x-ndjson")
+    assert status == "200 OK"
+    assert headers["Content-Type"] == "application/x-ndjson"
+
+    # Verify that every line is a student
+    students = [json.loads(line) for line in b"".join(chunks).decode().splitlines()]
+    assert len(students) > 1, f"Expected more than 1 student record, but got {len(students)}"
+    for student in students:
+        assert "studentId" in student
+        assert "firstName" in student
+
+    # The JSON array format streams the same students
+    status, headers, chunks = call_stream_app("/students", query_string="format=json")
+    assert headers["Content-Type"] == "application/json"
+    assert json.loads(b"".join(chunks)) == students
+
+    # The Web Adapter's readiness check and anything else
+    assert call_stream_app("/healthz")[0] == "200 OK"
+    assert call_stream_app("/programs")[0] == "404 Not Found"
+
+
+def test_stream_released_when_client_disconnects():
+    """A client that goes away mid-stream doesn't leave the connection stuck in the transaction"""
+
+    environ = {"REQUEST_METHOD": "GET", "PATH_INFO": "/students"}
+    setup_testing_defaults(environ)
+    body = stream_app.app(environ, lambda status, headers: None)
+    next(body)
+    # What the server does when the client disconnects
+    body.close()
+
+    result = lambda_function.handler(utils.create_rest_event("GET", "/students/1"), mock_context)
+    assert result["statusCode"] == 200